@@ -0,0 +1,121 @@
+"""Activity logging for the admin audit trail (user_activities).
+
+ACTIVITY_LOG_MODE selects how rows are written:
+
+- 'transactional' adds the activity to the current session so it commits in
+  the same transaction as the task change it describes.
+- 'async' holds activities until the request's transaction commits, then
+  hands them to a bounded in-process queue. A background thread writes them
+  to user_activities in bulk inserts. The queue is flushed when the process
+  exits normally (including gunicorn's graceful worker shutdown).
+"""
+import atexit
+import queue
+import threading
+from datetime import datetime
+
+from sqlalchemy import event
+
+
+class ActivityLogger:
+
+    def __init__(self, app, db, model):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.mode = app.config.get('ACTIVITY_LOG_MODE', 'transactional')
+        if self.mode not in ('transactional', 'async'):
+            raise ValueError(f"Unknown ACTIVITY_LOG_MODE: {self.mode}")
+        self.batch_size = app.config.get('ACTIVITY_LOG_BATCH_SIZE', 500)
+        self.flush_interval = app.config.get('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0)
+        self.queue = queue.Queue(maxsize=app.config.get('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        if self.mode == 'async':
+            event.listen(db.session, 'after_commit', self._on_commit)
+            event.listen(db.session, 'after_rollback', self._on_rollback)
+            atexit.register(self.shutdown)
+
+    def log(self, user_id, activity_type, task_id=None, task_title=None):
+        """Record an activity as part of the current transaction."""
+        self.log_many([{
+            'user_id': user_id,
+            'activity_type': activity_type,
+            'task_id': task_id,
+            'task_title': task_title
+        }])
+
+    def log_many(self, activities):
+        """Record several activity dicts as part of the current transaction."""
+        if not activities:
+            return
+        timestamp = datetime.utcnow()
+        rows = [dict(activity, timestamp=timestamp) for activity in activities]
+        if self.mode == 'transactional':
+            self.db.session.execute(self.db.insert(self.model), rows)
+        else:
+            self.db.session().info.setdefault('pending_activities', []).extend(rows)
+
+    def _on_commit(self, session):
+        rows = session.info.pop('pending_activities', None)
+        if not rows:
+            return
+        self._ensure_worker()
+        for row in rows:
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                # Never drop audit rows: write the overflow directly instead
+                self._write([row])
+
+    def _on_rollback(self, session):
+        session.info.pop('pending_activities', None)
+
+    def _ensure_worker(self):
+        # Started lazily so forked gunicorn workers each get their own thread
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='activity-log', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._drain(timeout=self.flush_interval)
+            if batch:
+                self._write(batch)
+
+    def _drain(self, timeout=None):
+        """Take up to batch_size queued rows, waiting up to timeout for the first."""
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=timeout) if timeout else self.queue.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, rows):
+        with self.app.app_context():
+            try:
+                self.db.session.execute(self.db.insert(self.model), rows)
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                self.app.logger.error('Failed to write %d activities: %s', len(rows), e)
+
+    def flush(self):
+        """Write everything still queued in the calling thread."""
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._write(batch)
+
+    def shutdown(self):
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(timeout=self.flush_interval + 5)
+        self.flush()
@@ -1,15 +1,37 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, Response, g, render_template, request, redirect, url_for, flash, session, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired
 import os
-from datetime import datetime
+import re
+import base64
+import hashlib
+import time
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
 from config import Config
+from events import create_event_bus, format_sse
+from exports import EXPORT_FORMATS, stream_export
+from activity_log import ActivityLogger
+from cache import LRUCache, create_cache
+from passwords import PasswordHasher
+from routing import RoutingSession, init_replica_routing, replica_reads
+from profiling import RequestProfiler
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+init_replica_routing(app)
+event_bus = create_event_bus(app.config)
+password_hasher = PasswordHasher(app.config)
+profiler = RequestProfiler(app)
+
+@app.context_processor
+def inject_event_streams():
+    # Pages open /events only when the workers can hold it (see EVENT_STREAMS)
+    return {'event_streams': app.config['EVENT_STREAMS']}
 
 # Prevent caching of dynamic pages to avoid forward/back showing protected pages
 @app.after_request
@@ -17,6 +39,11 @@ def add_no_cache_headers(response):
     # Skip static assets to allow normal caching
     if request.path.startswith('/static/'):
         return response
+    # ETagged JSON data may be kept by the browser only, and must be revalidated on every use
+    if response.headers.get('ETag') and request.method == 'GET':
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['Vary'] = 'Cookie'
+        return response
     response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '0'
@@ -31,8 +58,24 @@ class User(db.Model):
     password = db.Column(db.String(200), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     tasks = db.relationship('Task', backref='owner', lazy=True)
-    sent_messages = db.relationship('ChatMessage', foreign_keys='ChatMessage.sender_id', backref='sender', lazy=True)
-    received_messages = db.relationship('ChatMessage', foreign_keys='ChatMessage.receiver_id', backref='receiver', lazy=True)
+    # Loading messages loads their senders and receivers in one extra query, never one per message
+    sent_messages = db.relationship('ChatMessage', foreign_keys='ChatMessage.sender_id',
+                                    backref=db.backref('sender', lazy='selectin'), lazy=True)
+    received_messages = db.relationship('ChatMessage', foreign_keys='ChatMessage.receiver_id',
+                                        backref=db.backref('receiver', lazy='selectin'), lazy=True)
+
+TASK_PRIORITIES = ('low', 'medium', 'high')
+
+class TaskPriority(db.TypeDecorator):
+    """Priority names stored as small integers, so higher priorities sort first in DESC order."""
+    impl = db.SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else TASK_PRIORITIES.index(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else TASK_PRIORITIES[value]
 
 class Task(db.Model):
     __tablename__ = 'tasks'
@@ -40,22 +83,70 @@ class Task(db.Model):
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
     status = db.Column(db.String(20), nullable=False, default='to_do')  # to_do, in_progress, done
-    # Comment out priority column temporarily to avoid errors
-    # priority = db.Column(db.String(20), nullable=False, default='medium')  # low, medium, high
+    # Stored as priority_level; older databases may still carry an unused varchar 'priority' column
+    priority = db.Column('priority_level', TaskPriority, nullable=False, default='medium', server_default='1')
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     team_visible = db.Column(db.Boolean, default=True)  # Make tasks visible to team by default
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Add property to handle missing priority column
-    @property
-    def priority(self):
-        return 'medium'
 
-    @priority.setter
-    def priority(self, value):
-        # No-op setter to avoid errors when forms submit priority
-        pass
+    # Boards filter on user_id and come back bucketed by status, highest priority and most recent first
+    __table_args__ = (
+        db.Index('ix_tasks_board', 'user_id', 'status', priority.desc(), updated_at.desc()),
+    )
+
+# Team feed keyset pagination walks (updated_at DESC, id) over visible tasks
+db.Index('ix_tasks_team_feed', Task.team_visible, Task.updated_at.desc(), Task.id)
+
+# Full-text search over title and description: an expression GIN index on
+# PostgreSQL and an external-content FTS5 table kept in sync by triggers on SQLite
+TASK_SEARCH_VECTOR = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+TASK_SEARCH_DDL = {
+    'postgresql': [
+        f"CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks USING GIN ({TASK_SEARCH_VECTOR})",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    ],
+}
+for dialect, statements in TASK_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Task.__table__, 'after_create', db.DDL(statement).execute_if(dialect=dialect))
+event.listen(Task.__table__, 'before_drop', db.DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect='sqlite'))
+
+def create_search_index(connection):
+    """Create the task search index on an existing database and backfill it."""
+    statements = TASK_SEARCH_DDL.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.execute(db.text(statement))
+    if connection.dialect.name == 'sqlite':
+        connection.execute(db.text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+    return bool(statements)
+
+class TaskStat(db.Model):
+    """Task counts per user and status, updated in the same transaction as every task write."""
+    __tablename__ = 'task_stats'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    task_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    visible_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # team_visible tasks only
+
+# Recomputes task_stats from tasks (rebuild_task_stats.py and the migration that adds the table)
+TASK_STATS_QUERY_SQL = (
+    "SELECT user_id, status, COUNT(*), SUM(CASE WHEN team_visible THEN 1 ELSE 0 END) "
+    "FROM tasks GROUP BY user_id, status"
+)
+TASK_STATS_REBUILD_SQL = f"INSERT INTO task_stats (user_id, status, task_count, visible_count) {TASK_STATS_QUERY_SQL}"
 
 class UserActivity(db.Model):
     __tablename__ = 'user_activities'
@@ -67,6 +158,26 @@ class UserActivity(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.relationship('User', backref='activities')
 
+    # The admin log pages by (timestamp, id), optionally narrowed by user or type
+    __table_args__ = (
+        db.Index('ix_user_activities_timestamp', 'timestamp', 'id'),
+        db.Index('ix_user_activities_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_user_activities_type_timestamp', 'activity_type', 'timestamp'),
+    )
+
+class UserActivityRollup(db.Model):
+    """Per-user daily activity counts for rows compacted out of user_activities."""
+    __tablename__ = 'user_activity_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    activity_type = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', 'activity_type', name='uq_user_activity_rollups_key'),
+    )
+
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
     id = db.Column(db.Integer, primary_key=True)
@@ -75,6 +186,522 @@ class ChatMessage(db.Model):
     message = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Conversation sync filters on the (receiver, sender) pair and walks ids
+    __table_args__ = (
+        db.Index('ix_chat_messages_conversation', 'receiver_id', 'sender_id', 'id'),
+    )
+
+class ChatMessageArchive(db.Model):
+    """Chat messages moved out of chat_messages by archive_chat.py; read-only.
+
+    Ids are kept, and every archived id is lower than every id left in
+    chat_messages. On Postgres the table is partitioned by month of
+    ``timestamp`` (the archive job creates partitions as it needs them), so
+    the partition key is part of the primary key.
+    """
+    __tablename__ = 'chat_messages_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    receiver_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    message = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime, primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_chat_messages_archive_conversation', 'receiver_id', 'sender_id', 'id'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
+
+activity_logger = ActivityLogger(app, db, UserActivity)
+board_cache = create_cache(app.config)
+
+# Keep per-process cache versions in step with writes made by other workers
+if not board_cache.backend.shared:
+    event_bus.add_listener('cache', lambda event: [board_cache.bump(ns) for ns in event['namespaces']])
+
+def invalidate_cache(namespaces):
+    """Bump cache version stamps here and, through the event bus, in other workers."""
+    for namespace in namespaces:
+        board_cache.bump(namespace)
+    event_bus.publish('cache', {'type': 'cache.invalidate', 'namespaces': namespaces})
+
+def invalidate_tasks(user_id):
+    """Drop cached board and team feed data after a user's tasks change."""
+    invalidate_cache([f'board:{user_id}', 'team'])
+
+# Identity loading
+Identity = namedtuple('Identity', 'id username email is_admin')
+identity_cache = LRUCache(app.config['IDENTITY_CACHE_SIZE'], app.config['IDENTITY_CACHE_TTL'])
+event_bus.add_listener('identity', lambda event: identity_cache.delete(event['user_id']))
+
+def current_user():
+    """Return the logged-in user's Identity, or None if nobody is logged in.
+
+    Loaded at most once per request, and usually served from a short-lived
+    cross-request cache, so routes never need to re-read the users table.
+    """
+    if 'identity' in g:
+        return g.identity
+    identity = None
+    user_id = session.get('user_id')
+    if user_id is not None:
+        found, identity = identity_cache.get(user_id)
+        if not found:
+            row = db.session.query(
+                User.id, User.username, User.email, User.is_admin
+            ).filter(User.id == user_id).first()
+            identity = Identity(row.id, row.username, row.email, bool(row.is_admin)) if row else None
+            identity_cache.set(user_id, identity)
+    g.identity = identity
+    return identity
+
+def invalidate_identity(user_id):
+    """Forget a user's cached identity here and in other workers after it changes."""
+    identity_cache.delete(user_id)
+    g.pop('identity', None)
+    event_bus.publish('identity', {'type': 'identity.invalidate', 'user_id': user_id})
+
+def chat_namespace(sender_id, receiver_id):
+    """Cache namespace versioning one conversation's messages."""
+    if receiver_id is None:
+        return 'chat:team'
+    low, high = sorted((int(sender_id), int(receiver_id)))
+    return f'chat:{low}:{high}'
+
+def conditional_json(namespaces, build):
+    """Serve ``build()`` as JSON with a strong ETag, or 304 if the client's copy is current.
+
+    The tag covers the viewer, the full request path and the version stamps of
+    every namespace the data depends on, so it changes whenever the data could
+    have and is never shared between users.
+    """
+    parts = [str(current_user().id), request.full_path]
+    parts += [board_cache.version(namespace) for namespace in namespaces]
+    etag = hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    return response
+
+# Board helpers
+TASK_STATUSES = ('to_do', 'in_progress', 'done')
+
+def parse_board_filters(args):
+    """Read the board's status and priority filters from query args; raises ValueError if invalid."""
+    filters = {
+        'status': args.get('status') or None,
+        'priority': args.get('priority') or None
+    }
+    if filters['status'] and filters['status'] not in TASK_STATUSES:
+        raise ValueError('Invalid status')
+    if filters['priority'] and filters['priority'] not in TASK_PRIORITIES:
+        raise ValueError('Invalid priority')
+    return filters
+
+def load_board(user_id, status=None, priority=None):
+    """Load a user's tasks in one query, bucketed by status.
+
+    Rows come back from ix_tasks_board already ordered highest priority and
+    most recently updated first, optionally narrowed to one status and/or
+    priority. Only the columns the board templates render are selected, and
+    the result is cached until the user's tasks change.
+    """
+    def query_board():
+        board = {status: [] for status in TASK_STATUSES}
+        query = Task.query.options(
+            db.load_only(Task.id, Task.title, Task.description, Task.status, Task.priority)
+        ).filter_by(user_id=user_id)
+        if status:
+            query = query.filter(Task.status == status)
+        if priority:
+            query = query.filter(Task.priority == priority)
+        tasks = query.order_by(Task.status, Task.priority.desc(), Task.updated_at.desc()).all()
+        for task in tasks:
+            board.setdefault(task.status, []).append({
+                'id': task.id,
+                'title': task.title,
+                'description': task.description,
+                'status': task.status,
+                'priority': task.priority
+            })
+        return board
+
+    return board_cache.get_or_load(f'board:{user_id}', f'tasks:{status}:{priority}', query_board)
+
+# Task statistics
+TASK_STATS_UPSERT = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def adjust_task_stats(deltas):
+    """Add task count changes to task_stats within the current transaction.
+
+    ``deltas`` is a Counter keyed by ``(user_id, status, team_visible)``. Each
+    affected row is changed with an atomic upsert (``count = count + delta``),
+    so concurrent writers never overwrite each other's counts.
+    """
+    rows = {}
+    for (user_id, status, visible), delta in deltas.items():
+        row = rows.setdefault((user_id, status), {'user_id': user_id, 'status': status,
+                                                  'task_count': 0, 'visible_count': 0})
+        row['task_count'] += delta
+        if visible:
+            row['visible_count'] += delta
+    # Sorted, so two transactions touching the same rows lock them in the same order
+    rows = [row for key, row in sorted(rows.items()) if row['task_count'] or row['visible_count']]
+    if not rows:
+        return
+    statement = TASK_STATS_UPSERT[db.engine.dialect.name](TaskStat)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TaskStat.user_id, TaskStat.status],
+        set_={'task_count': TaskStat.task_count + statement.excluded.task_count,
+              'visible_count': TaskStat.visible_count + statement.excluded.visible_count}
+    )
+    db.session.execute(statement, rows)
+
+def load_task_stats(visible_only=False):
+    """Per-member task counts by status, read from task_stats rather than tasks.
+
+    Returns one dict per user with a count for each status plus ``total``,
+    ordered by username. ``visible_only`` counts team-visible tasks only.
+    Cached until any task changes.
+    """
+    count = TaskStat.visible_count if visible_only else TaskStat.task_count
+
+    def query_task_stats():
+        rows = db.session.query(
+            TaskStat.user_id, User.username, TaskStat.status, count.label('count')
+        ).join(User, TaskStat.user_id == User.id).filter(count > 0).order_by(User.username)
+        stats = {}
+        for row in rows:
+            member = stats.setdefault(row.user_id, dict(
+                {status: 0 for status in TASK_STATUSES}, user_id=row.user_id, username=row.username, total=0
+            ))
+            member[row.status] = member.get(row.status, 0) + row.count
+            member['total'] += row.count
+        return list(stats.values())
+
+    return board_cache.get_or_load('team', f'stats:{visible_only}', query_task_stats)
+
+def encode_cursor(timestamp, row_id):
+    """Encode a (timestamp, id) keyset position as an opaque URL-safe string."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor(); raises ValueError if malformed."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError as e:
+        raise ValueError('Invalid cursor') from e
+
+def load_team_tasks(user_id, limit, cursor=None):
+    """Load one window of teammates' visible tasks, newest first.
+
+    Rows are flat projections carrying the owner's username, so the team
+    progress table renders in one pass without loading whole user records.
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    Windows are cached until any team task changes.
+    """
+    position = decode_cursor(cursor) if cursor else None
+
+    def query_team_tasks():
+        query = db.session.query(
+            Task.id, Task.title, Task.status, Task.updated_at, Task.user_id,
+            User.username.label('owner_username')
+        ).join(User, Task.user_id == User.id).filter(
+            Task.team_visible == True, Task.user_id != user_id
+        )
+        if position:
+            updated_at, task_id = position
+            query = query.filter(db.or_(
+                Task.updated_at < updated_at,
+                db.and_(Task.updated_at == updated_at, Task.id < task_id)
+            ))
+        rows = query.order_by(Task.updated_at.desc(), Task.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].id)
+        return [row._asdict() for row in rows], next_cursor
+
+    return board_cache.get_or_load('team', f'{user_id}:{limit}:{cursor or ""}', query_team_tasks)
+
+def search_tasks(user_id, text, statuses=None, scope='mine', limit=20, offset=0):
+    """Rank tasks matching ``text`` using the database's full-text index.
+
+    ``scope`` is ``'mine'`` for the user's own tasks or ``'team'`` for every
+    team-visible task. Returns ``(rows, has_more)``; each row carries a
+    ``rank`` where higher is a better match.
+    """
+    columns = [Task.id, Task.title, Task.description, Task.status, Task.updated_at,
+               Task.user_id, User.username.label('owner_username')]
+    dialect = db.session.get_bind().dialect.name
+    # Both indexes match every word as a prefix, so a half-typed word already finds its tasks.
+    # Only letters and digits are kept, so user input cannot inject query syntax
+    words = re.findall(r'[^\W_]+', text)
+    if dialect in ('postgresql', 'sqlite') and not words:
+        return [], False
+
+    if dialect == 'postgresql':
+        vector = db.literal_column(TASK_SEARCH_VECTOR)
+        tsquery = db.func.to_tsquery('english', ' & '.join(f'{word}:*' for word in words))
+        rank = db.func.ts_rank(vector, tsquery)
+        query = db.session.query(*columns, rank.label('rank')).filter(vector.op('@@')(tsquery))
+        order = [rank.desc(), Task.id.desc()]
+    elif dialect == 'sqlite':
+        terms = ['"{}"*'.format(word) for word in words]
+        fts = db.table('tasks_fts', db.column('rowid'), db.column('tasks_fts'))
+        bm25 = db.func.bm25(db.literal_column('tasks_fts'))
+        query = db.session.query(*columns, (-bm25).label('rank')).join(
+            fts, fts.c.rowid == Task.id
+        ).filter(fts.c.tasks_fts.op('MATCH')(' '.join(terms)))
+        order = [bm25, Task.id.desc()]
+    else:
+        pattern = f"%{text}%"
+        query = db.session.query(*columns, db.literal(0).label('rank')).filter(
+            db.or_(Task.title.ilike(pattern), Task.description.ilike(pattern))
+        )
+        order = [Task.updated_at.desc(), Task.id.desc()]
+
+    query = query.join(User, Task.user_id == User.id)
+    if scope == 'team':
+        query = query.filter(db.or_(Task.user_id == user_id, Task.team_visible == True))
+    else:
+        query = query.filter(Task.user_id == user_id)
+    if statuses:
+        query = query.filter(Task.status.in_(statuses))
+
+    rows = query.order_by(*order).offset(offset).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+def get_page_size(default_key, max_key):
+    """Read the ``limit`` query arg, clamped to the configured bounds."""
+    limit = request.args.get('limit', app.config[default_key], type=int)
+    return max(1, min(limit, app.config[max_key]))
+
+# Chat helpers
+def parse_conversation(conversation):
+    """Return the other user's id for a direct conversation, or None for the team channel.
+
+    ``conversation`` is ``'team'`` for the team-wide channel or the id of the
+    other user in a direct conversation; raises ValueError otherwise.
+    """
+    if not conversation or conversation == 'team':
+        return None
+    try:
+        return int(conversation)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid conversation') from e
+
+def conversation_filter(user_id, conversation, model=ChatMessage):
+    """Build the filter for the viewer's conversation on chat_messages or its archive."""
+    other_id = parse_conversation(conversation)
+    if other_id is None:
+        return model.receiver_id.is_(None)
+    return db.or_(
+        db.and_(model.receiver_id == other_id, model.sender_id == user_id),
+        db.and_(model.receiver_id == user_id, model.sender_id == other_id)
+    )
+
+def load_chat_messages(user_id, conversation, limit, since_id=None, before_id=None):
+    """Load one window of a conversation as flat rows, oldest first.
+
+    With ``since_id`` the window holds the messages after that id, otherwise
+    the latest messages (before ``before_id`` when given). Returns
+    ``(rows, has_more)``, where ``has_more`` says whether further messages
+    lie beyond the window in the direction being read.
+
+    Reading backwards (``before_id``) past the oldest message left in
+    chat_messages carries on into chat_messages_archive, so only users who
+    scroll that far back touch the archive. Archived rows have ``archived``
+    set and can no longer be edited or deleted.
+    """
+    def conversation_query(model):
+        return db.session.query(
+            model.id, model.sender_id, model.receiver_id, model.message, model.timestamp,
+            User.username.label('sender_username'), db.literal(model is ChatMessageArchive).label('archived')
+        ).join(User, model.sender_id == User.id).filter(
+            conversation_filter(user_id, conversation, model)
+        )
+
+    query = conversation_query(ChatMessage)
+    if since_id is not None:
+        rows = query.filter(ChatMessage.id > since_id).order_by(ChatMessage.id).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+    if before_id is not None:
+        query = query.filter(ChatMessage.id < before_id)
+    rows = query.order_by(ChatMessage.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit or not chat_archive_in_use():
+        has_more = len(rows) > limit
+    elif before_id is None and rows:
+        # The latest window ends at the oldest live message; scrolling back goes on into the archive
+        has_more = True
+    else:
+        # Every archived id is below every live one, so the window continues there
+        archived = conversation_query(ChatMessageArchive)
+        oldest_id = rows[-1].id if rows else before_id
+        if oldest_id is not None:
+            archived = archived.filter(ChatMessageArchive.id < oldest_id)
+        rows += archived.order_by(ChatMessageArchive.id.desc()).limit(limit + 1 - len(rows)).all()
+        has_more = len(rows) > limit
+    rows = rows[:limit]
+    rows.reverse()
+    return rows, has_more
+
+def chat_archive_in_use():
+    """Whether archive_chat.py has archived anything; cached until it runs again."""
+    return board_cache.get_or_load('chat:archive', 'in_use',
+                                   lambda: db.session.query(ChatMessageArchive.id).first() is not None)
+
+def serialize_message(row):
+    return {
+        'id': row.id,
+        'sender': row.sender_username,
+        'sender_id': row.sender_id,
+        'receiver_id': row.receiver_id,
+        'message': row.message,
+        'timestamp': row.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'archived': bool(row.archived)
+    }
+
+# Admin activity log helpers
+ACTIVITY_TYPES = ('added', 'modified', 'deleted')
+
+def parse_activity_filters(args):
+    """Read the admin log filters from query args; raises ValueError if invalid."""
+    filters = {
+        'user_id': args.get('user_id', type=int),
+        'activity_type': args.get('activity_type') or None,
+        'start': args.get('start') or None,
+        'end': args.get('end') or None
+    }
+    if filters['activity_type'] and filters['activity_type'] not in ACTIVITY_TYPES:
+        raise ValueError('Unknown activity type')
+    for key in ('start', 'end'):
+        if filters[key]:
+            try:
+                datetime.strptime(filters[key], '%Y-%m-%d')
+            except ValueError as e:
+                raise ValueError('Dates must be YYYY-MM-DD') from e
+    return filters
+
+def load_activities(filters, limit, cursor=None):
+    """Load one window of the activity log, newest first.
+
+    Returns ``(rows, next_cursor)`` like load_team_tasks().
+    """
+    query = db.session.query(
+        UserActivity.id, UserActivity.activity_type, UserActivity.task_title,
+        UserActivity.timestamp, User.username
+    ).join(User, UserActivity.user_id == User.id)
+    if filters['user_id']:
+        query = query.filter(UserActivity.user_id == filters['user_id'])
+    if filters['activity_type']:
+        query = query.filter(UserActivity.activity_type == filters['activity_type'])
+    if filters['start']:
+        query = query.filter(UserActivity.timestamp >= datetime.strptime(filters['start'], '%Y-%m-%d'))
+    if filters['end']:
+        # The end date is inclusive
+        end = datetime.strptime(filters['end'], '%Y-%m-%d') + timedelta(days=1)
+        query = query.filter(UserActivity.timestamp < end)
+    if cursor:
+        timestamp, activity_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            UserActivity.timestamp < timestamp,
+            db.and_(UserActivity.timestamp == timestamp, UserActivity.id < activity_id)
+        ))
+    rows = query.order_by(UserActivity.timestamp.desc(), UserActivity.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return rows, next_cursor
+
+def load_activity_rollup_totals():
+    """Sum compacted activity counts per user and type."""
+    return db.session.query(
+        User.username, UserActivityRollup.activity_type,
+        db.func.sum(UserActivityRollup.count).label('total'),
+        db.func.min(UserActivityRollup.day).label('first_day'),
+        db.func.max(UserActivityRollup.day).label('last_day')
+    ).join(User, UserActivityRollup.user_id == User.id).group_by(
+        User.username, UserActivityRollup.activity_type
+    ).order_by(User.username, UserActivityRollup.activity_type).all()
+
+# Data exports
+def export_tasks_query():
+    return db.select(
+        Task.id, Task.user_id, User.username.label('owner'), Task.title, Task.description,
+        Task.status, Task.priority, Task.team_visible, Task.created_at, Task.updated_at
+    ).join(User, Task.user_id == User.id).order_by(Task.id), Task.created_at, [Task.user_id]
+
+def export_chat_messages_query(model=ChatMessage):
+    sender, receiver = db.aliased(User), db.aliased(User)
+    return db.select(
+        model.id, model.sender_id, sender.username.label('sender'),
+        model.receiver_id, receiver.username.label('receiver'), model.message, model.timestamp
+    ).join(sender, model.sender_id == sender.id).outerjoin(
+        receiver, model.receiver_id == receiver.id
+    ).order_by(model.id), model.timestamp, [model.sender_id, model.receiver_id]
+
+def export_activities_query():
+    return db.select(
+        UserActivity.id, UserActivity.user_id, User.username, UserActivity.activity_type,
+        UserActivity.task_id, UserActivity.task_title, UserActivity.timestamp
+    ).join(User, UserActivity.user_id == User.id).order_by(UserActivity.id), UserActivity.timestamp, [UserActivity.user_id]
+
+# Each dataset: a function returning (query in id order, timestamp column, user columns)
+EXPORT_DATASETS = {
+    'tasks': export_tasks_query,
+    'chat_messages': export_chat_messages_query,
+    'chat_archive': lambda: export_chat_messages_query(ChatMessageArchive),
+    'activities': export_activities_query,
+}
+
+def export_query(dataset, filters):
+    """Build the export query for a dataset, filtered like the activity log.
+
+    ``filters`` come from parse_activity_filters(): a user (the owner, or
+    either side of a chat message), an inclusive date range on the creation
+    time, and for activities an activity type. Rows are ordered by id.
+    """
+    query, timestamp, user_columns = EXPORT_DATASETS[dataset]()
+    if filters['user_id']:
+        query = query.where(db.or_(*[column == filters['user_id'] for column in user_columns]))
+    if filters['activity_type'] and dataset == 'activities':
+        query = query.where(UserActivity.activity_type == filters['activity_type'])
+    if filters['start']:
+        query = query.where(timestamp >= datetime.strptime(filters['start'], '%Y-%m-%d'))
+    if filters['end']:
+        query = query.where(timestamp < datetime.strptime(filters['end'], '%Y-%m-%d') + timedelta(days=1))
+    return query
+
+# Push helpers
+def task_event_payload(task, owner_username):
+    return {
+        'id': task.id,
+        'title': task.title,
+        'status': task.status,
+        'owner': owner_username,
+        'owner_id': task.user_id,
+        'updated_at': task.updated_at.strftime('%Y-%m-%d %H:%M')
+    }
+
+def publish_task_event(event_type, payload):
+    """Publish a task change to teammates' open dashboards."""
+    event_bus.publish('team', {'type': event_type, 'task': payload})
+
+def publish_chat_event(event_type, payload, sender_id, receiver_id):
+    """Publish a chat change to everyone who can see the conversation."""
+    event = {'type': event_type, 'message': payload}
+    if receiver_id is None:
+        event_bus.publish('team', event)
+        return
+    for user_id in {sender_id, int(receiver_id)}:
+        event_bus.publish(f'user:{user_id}', event)
+
 # Routes
 @app.route('/')
 def index():
@@ -94,7 +721,7 @@ def register():
             return redirect(url_for('register'))
         
         # Create new user
-        hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+        hashed_password = password_hasher.hash(password)
         new_user = User(username=username, email=email, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
@@ -115,7 +742,7 @@ def login():
             # Create admin user if it doesn't exist
             admin = User.query.filter_by(username='admin').first()
             if not admin:
-                hashed_password = generate_password_hash('team3', method='pbkdf2:sha256')
+                hashed_password = password_hasher.hash('team3')
                 admin = User(username='admin', email='admin@nexusboard.com', password=hashed_password, is_admin=True)
                 db.session.add(admin)
                 db.session.commit()
@@ -130,7 +757,15 @@ def login():
         # Regular user login
         user = User.query.filter_by(username=username).first()
         
-        if user and check_password_hash(user.password, password):
+        matches, needs_rehash = password_hasher.verify(user.password, password) if user else (False, False)
+        
+        if matches:
+            # Upgrade hashes made with an older method or cost
+            if needs_rehash:
+                user.password = password_hasher.hash(password)
+                db.session.commit()
+                invalidate_identity(user.id)
+            
             session['user_id'] = user.id
             session['username'] = user.username
             session['email'] = user.email
@@ -152,31 +787,183 @@ def logout():
 
 # Admin dashboard route
 @app.route('/admin_dashboard')
+@replica_reads
 def admin_dashboard():
-    if 'user_id' not in session or not session.get('is_admin', False):
+    user = current_user()
+    if user is None or not user.is_admin:
         flash('Admin access required')
         return redirect(url_for('login'))
     
     users = User.query.filter(User.is_admin == False).all()
-    activities = UserActivity.query.order_by(UserActivity.timestamp.desc()).all()
     
-    return render_template('admin_dashboard.html', users=users, activities=activities)
+    try:
+        filters = parse_activity_filters(request.args)
+        activities, next_cursor = load_activities(filters, app.config['ACTIVITY_PAGE_SIZE'],
+                                                  request.args.get('cursor'))
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for('admin_dashboard'))
+    
+    # Page links carry the active filters along with the cursor
+    active_filters = {key: value for key, value in filters.items() if value}
+    next_url = url_for('admin_dashboard', cursor=next_cursor, **active_filters) if next_cursor else None
+    newest_url = url_for('admin_dashboard', **active_filters) if request.args.get('cursor') else None
+    
+    task_counts = {member['user_id']: member for member in load_task_stats()}
+    
+    return render_template('admin_dashboard.html', users=users, task_counts=task_counts, activities=activities,
+                           filters=filters, activity_types=ACTIVITY_TYPES,
+                           next_url=next_url, newest_url=newest_url,
+                           rollup_totals=load_activity_rollup_totals(),
+                           retention_days=app.config['ACTIVITY_RETENTION_DAYS'])
+
+@app.route('/admin/export/<dataset>.<fmt>')
+@replica_reads
+def export_data(dataset, fmt):
+    user = current_user()
+    if user is None or not user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unknown export'}), 404
+    
+    try:
+        filters = parse_activity_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Rows are fetched and sent in batches while the response streams; the
+    # request context (and its database session) lives until the last chunk
+    chunks = stream_export(db.session, export_query(dataset, filters), fmt, app.config['EXPORT_BATCH_SIZE'])
+    filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"',
+                             'X-Accel-Buffering': 'no'})
+
+@app.route('/admin/cache_stats')
+def cache_stats():
+    user = current_user()
+    if user is None or not user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    return jsonify(board_cache.stats())
+
+def pool_stats():
+    """Connection counts for this worker's pool (zeros for pools that do not track them)."""
+    pool = db.engine.pool
+    stat = lambda name: getattr(pool, name)() if hasattr(pool, name) else 0
+    return {
+        'size': stat('size'),
+        'checked_out': stat('checkedout'),
+        'idle': stat('checkedin'),
+        'overflow': max(0, stat('overflow'))
+    }
+
+@app.route('/metrics')
+def metrics():
+    # Pool and route internals are only exposed to scrapers holding the token
+    token = app.config['METRICS_TOKEN']
+    if not token:
+        return Response('Not Found\n', status=404, mimetype='text/plain')
+    if request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+
+    # Prometheus text format; every worker reports its own pool and routes, labelled by pid
+    pid = os.getpid()
+    lines = []
+    for name, value in pool_stats().items():
+        metric = f'nexusboard_db_pool_{name}'
+        lines.append(f'# TYPE {metric} gauge')
+        lines.append(f'{metric}{{pid="{pid}"}} {value}')
+    if profiler.enabled:
+        lines += profiler.metric_lines(f',pid="{pid}"')
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
 # Team chat routes
 @app.route('/team_chat')
+@replica_reads
 def team_chat():
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         flash('Please login first')
         return redirect(url_for('login'))
     
-    users = User.query.all()
-    messages = ChatMessage.query.order_by(ChatMessage.timestamp).all()
+    users = db.session.query(User.id, User.username).order_by(User.username).all()
+    messages, has_more = load_chat_messages(user.id, 'team', app.config['CHAT_PAGE_SIZE'])
+    
+    return render_template('team_chat.html', users=users, messages=messages,
+                           has_more=has_more, poll_interval=app.config['CHAT_POLL_INTERVAL'])
+
+@app.route('/chat/messages')
+@replica_reads
+def chat_messages():
+    user = current_user()
+    if user is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    limit = get_page_size('CHAT_PAGE_SIZE', 'CHAT_MAX_PAGE_SIZE')
+    conversation = request.args.get('conversation', 'team')
+    try:
+        other_id = parse_conversation(conversation)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def build():
+        messages, has_more = load_chat_messages(
+            user.id,
+            conversation,
+            limit,
+            since_id=request.args.get('since_id', type=int),
+            before_id=request.args.get('before_id', type=int)
+        )
+        return {
+            'messages': [serialize_message(message) for message in messages],
+            'has_more': has_more
+        }
     
-    return render_template('team_chat.html', users=users, messages=messages)
+    return conditional_json([chat_namespace(user.id, other_id)], build)
+
+@app.route('/events')
+def events():
+    user = current_user()
+    if user is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    # 204 tells EventSource not to reconnect; pages poll instead
+    if not app.config['EVENT_STREAMS']:
+        return Response(status=204)
+    
+    subscriber = event_bus.subscribe(['team', f"user:{user.id}"])
+    heartbeat = app.config['EVENT_HEARTBEAT']
+    lifetime = app.config['EVENT_STREAM_SECONDS']
+    
+    def stream():
+        # Ending the stream frees the worker thread; the client reconnects after the retry delay
+        deadline = time.monotonic() + lifetime if lifetime else None
+        try:
+            yield 'retry: 5000\n\n'
+            while not subscriber.evicted:
+                timeout = heartbeat
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    timeout = min(timeout, remaining)
+                event = subscriber.get(timeout=timeout)
+                if event is None:
+                    # Keep proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                else:
+                    yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'X-Accel-Buffering': 'no'})
 
 @app.route('/send_message', methods=['POST'])
 def send_message():
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         return jsonify({'error': 'Not logged in'}), 401
     
     data = request.json
@@ -186,26 +973,43 @@ def send_message():
     if not message_text:
         return jsonify({'error': 'Message cannot be empty'}), 400
     
+    # Direct messages must name an existing user; anything else is team chat
+    if receiver_id:
+        try:
+            receiver_id = None if isinstance(receiver_id, bool) else int(receiver_id)
+        except (TypeError, ValueError):
+            receiver_id = None
+        if receiver_id is None or db.session.query(User.id).filter(User.id == receiver_id).first() is None:
+            return jsonify({'error': 'Invalid receiver'}), 400
+    else:
+        receiver_id = None
+    
     new_message = ChatMessage(
-        sender_id=session['user_id'],
-        receiver_id=receiver_id if receiver_id else None,
+        sender_id=user.id,
+        receiver_id=receiver_id,
         message=message_text
     )
     
     db.session.add(new_message)
     db.session.commit()
     
-    return jsonify({
+    payload = {
         'id': new_message.id,
-        'sender': session['username'],
-        'sender_id': session['user_id'],
+        'sender': user.username,
+        'sender_id': user.id,
+        'receiver_id': new_message.receiver_id,
         'message': message_text,
         'timestamp': new_message.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-    })
+    }
+    invalidate_cache([chat_namespace(new_message.sender_id, new_message.receiver_id)])
+    publish_chat_event('chat.created', payload, new_message.sender_id, new_message.receiver_id)
+    
+    return jsonify(payload)
 
 @app.route('/edit_message/<int:message_id>', methods=['PUT'])
 def edit_message(message_id):
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         return jsonify({'error': 'Not logged in'}), 401
     
     data = request.json
@@ -217,37 +1021,47 @@ def edit_message(message_id):
     message = ChatMessage.query.get_or_404(message_id)
     
     # Check if the message belongs to the logged-in user
-    if message.sender_id != session['user_id']:
+    if message.sender_id != user.id:
         return jsonify({'error': 'You are not authorized to edit this message'}), 403
     
     message.message = new_message_text
     db.session.commit()
     
-    return jsonify({
+    payload = {
         'id': message.id,
         'message': new_message_text,
         'timestamp': message.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-    })
+    }
+    invalidate_cache([chat_namespace(message.sender_id, message.receiver_id)])
+    publish_chat_event('chat.updated', payload, message.sender_id, message.receiver_id)
+    
+    return jsonify(payload)
 
 @app.route('/delete_message/<int:message_id>', methods=['DELETE'])
 def delete_message(message_id):
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         return jsonify({'error': 'Not logged in'}), 401
     
     message = ChatMessage.query.get_or_404(message_id)
     
     # Check if the message belongs to the logged-in user
-    if message.sender_id != session['user_id']:
+    if message.sender_id != user.id:
         return jsonify({'error': 'You are not authorized to delete this message'}), 403
     
+    sender_id, receiver_id = message.sender_id, message.receiver_id
     db.session.delete(message)
     db.session.commit()
     
+    invalidate_cache([chat_namespace(sender_id, receiver_id)])
+    publish_chat_event('chat.deleted', {'id': message_id}, sender_id, receiver_id)
+    
     return jsonify({'success': True})
 
 @app.route('/change_password', methods=['POST'])
 def change_password():
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         flash('Please login first')
         return redirect(url_for('login'))
     
@@ -256,10 +1070,10 @@ def change_password():
     confirm_password = request.form.get('confirm_password')
     
     # Get current user
-    user = User.query.get(session['user_id'])
+    account = db.session.get(User, user.id)
     
     # Verify current password
-    if not check_password_hash(user.password, current_password):
+    if not password_hasher.verify(account.password, current_password)[0]:
         flash('Current password is incorrect')
         return redirect(url_for('dashboard'))
     
@@ -269,110 +1083,211 @@ def change_password():
         return redirect(url_for('dashboard'))
     
     # Update password
-    user.password = generate_password_hash(new_password, method='pbkdf2:sha256')
+    account.password = password_hasher.hash(new_password)
     db.session.commit()
+    invalidate_identity(user.id)
     
     flash('Password updated successfully')
     return redirect(url_for('dashboard'))
 
 @app.route('/dashboard')
+@replica_reads
 def dashboard():
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         flash('Please login first')
         return redirect(url_for('login'))
     
-    user_id = session['user_id']
-    to_do_tasks = Task.query.filter_by(user_id=user_id, status='to_do').all()
-    in_progress_tasks = Task.query.filter_by(user_id=user_id, status='in_progress').all()
-    done_tasks = Task.query.filter_by(user_id=user_id, status='done').all()
+    try:
+        filters = parse_board_filters(request.args)
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for('dashboard'))
     
-    # Get team tasks (tasks from other users that are marked as team_visible)
-    team_tasks = Task.query.filter(Task.user_id != user_id, Task.team_visible == True).order_by(Task.updated_at.desc()).all()
+    user_id = user.id
+    board = load_board(user_id, **filters)
     
-    # Get all users for the team progress section
-    team_members = User.query.all()
+    # Get the first window of team tasks; the rest is fetched from /team_feed
+    team_tasks, team_next_cursor = load_team_tasks(user_id, app.config['TEAM_FEED_PAGE_SIZE'])
     
     return render_template('dashboard.html', 
-                          to_do_tasks=to_do_tasks, 
-                          in_progress_tasks=in_progress_tasks, 
-                          done_tasks=done_tasks,
+                          to_do_tasks=board['to_do'], 
+                          in_progress_tasks=board['in_progress'], 
+                          done_tasks=board['done'],
+                          filters=filters,
                           team_tasks=team_tasks,
-                          team_members=team_members)
+                          team_next_cursor=team_next_cursor,
+                          team_poll_interval=app.config['TEAM_FEED_POLL_INTERVAL'],
+                          team_stats=load_task_stats(visible_only=True))
 
 # Standalone Task Management page
 @app.route('/task_management')
+@replica_reads
 def task_management():
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         flash('Please login first')
         return redirect(url_for('login'))
 
-    user_id = session['user_id']
-    to_do_tasks = Task.query.filter_by(user_id=user_id, status='to_do').all()
-    in_progress_tasks = Task.query.filter_by(user_id=user_id, status='in_progress').all()
-    done_tasks = Task.query.filter_by(user_id=user_id, status='done').all()
+    try:
+        filters = parse_board_filters(request.args)
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for('task_management'))
+
+    board = load_board(user.id, **filters)
 
     return render_template('task_management.html',
-                           to_do_tasks=to_do_tasks,
-                           in_progress_tasks=in_progress_tasks,
-                           done_tasks=done_tasks)
+                           to_do_tasks=board['to_do'],
+                           in_progress_tasks=board['in_progress'],
+                           done_tasks=board['done'],
+                           filters=filters)
+
+@app.route('/team_feed')
+@replica_reads
+def team_feed():
+    user = current_user()
+    if user is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    limit = get_page_size('TEAM_FEED_PAGE_SIZE', 'TEAM_FEED_MAX_PAGE_SIZE')
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    def build():
+        rows, next_cursor = load_team_tasks(user.id, limit, cursor)
+        return {
+            'tasks': [{
+                'id': row['id'],
+                'title': row['title'],
+                'status': row['status'],
+                'owner': row['owner_username'],
+                'updated_at': row['updated_at'].strftime('%Y-%m-%d %H:%M')
+            } for row in rows],
+            'next_cursor': next_cursor
+        }
+    
+    return conditional_json(['team'], build)
+
+@app.route('/board')
+@replica_reads
+def board():
+    user = current_user()
+    if user is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    try:
+        filters = parse_board_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return conditional_json([f'board:{user.id}'], lambda: load_board(user.id, **filters))
+
+@app.route('/tasks/search')
+@replica_reads
+def task_search():
+    user = current_user()
+    if user is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    text = request.args.get('q', '').strip()
+    statuses = request.args.getlist('status')
+    scope = request.args.get('scope', 'mine')
+    if not text:
+        return jsonify({'error': 'Search text is required'}), 400
+    if any(status not in TASK_STATUSES for status in statuses):
+        return jsonify({'error': 'Invalid status'}), 400
+    if scope not in ('mine', 'team'):
+        return jsonify({'error': 'Invalid scope'}), 400
+    
+    limit = get_page_size('SEARCH_PAGE_SIZE', 'SEARCH_MAX_PAGE_SIZE')
+    offset = max(0, request.args.get('offset', 0, type=int))
+    rows, has_more = search_tasks(user.id, text, statuses, scope, limit, offset)
+    
+    return jsonify({
+        'tasks': [{
+            'id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'status': row.status,
+            'owner': row.owner_username,
+            'updated_at': row.updated_at.strftime('%Y-%m-%d %H:%M'),
+            'rank': float(row.rank)
+        } for row in rows],
+        'next_offset': offset + limit if has_more else None
+    })
 
 @app.route('/add_task', methods=['POST'])
 def add_task():
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         flash('Please login first')
         return redirect(url_for('login'))
     
     title = request.form.get('title')
     description = request.form.get('description')
     status = request.form.get('status')
+    priority = request.form.get('priority')
+    if priority not in TASK_PRIORITIES:
+        priority = 'medium'
     
-    new_task = Task(title=title, description=description, status=status, user_id=session['user_id'])
+    new_task = Task(title=title, description=description, status=status, priority=priority, user_id=user.id)
     db.session.add(new_task)
-    db.session.commit()
+    # Flush to assign the task id, then commit the task and its activity together
+    db.session.flush()
     
     # Log activity
-    activity = UserActivity(
-        user_id=session['user_id'],
-        activity_type='added',
-        task_id=new_task.id,
-        task_title=title
-    )
-    db.session.add(activity)
+    activity_logger.log(user.id, 'added', task_id=new_task.id, task_title=title)
+    adjust_task_stats(Counter({(user.id, new_task.status, new_task.team_visible): 1}))
     db.session.commit()
+    invalidate_tasks(user.id)
+    
+    if new_task.team_visible:
+        publish_task_event('task.created', task_event_payload(new_task, user.username))
     
     flash('Task added successfully!')
     return redirect(url_for('dashboard'))
 
 @app.route('/edit_task/<int:task_id>', methods=['GET', 'POST'])
 def edit_task(task_id):
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         flash('Please login first')
         return redirect(url_for('login'))
     
-    task = Task.query.get_or_404(task_id)
+    query = Task.query.filter_by(id=task_id)
+    if request.method == 'POST':
+        # Lock the row so concurrent edits apply their task_stats changes one after another
+        query = query.with_for_update()
+    task = query.first_or_404()
     
     # Check if the task belongs to the logged-in user
-    if task.user_id != session['user_id']:
+    if task.user_id != user.id:
         flash('You are not authorized to edit this task')
         return redirect(url_for('dashboard'))
     
     if request.method == 'POST':
+        old_status = task.status
         task.title = request.form.get('title')
         task.description = request.form.get('description')
         task.status = request.form.get('status')
-        task.priority = request.form.get('priority', 'medium')
-        
-        db.session.commit()
+        if request.form.get('priority') in TASK_PRIORITIES:
+            task.priority = request.form['priority']
         
         # Log activity
-        activity = UserActivity(
-            user_id=session['user_id'],
-            activity_type='modified',
-            task_id=task.id,
-            task_title=task.title
-        )
-        db.session.add(activity)
+        activity_logger.log(user.id, 'modified', task_id=task.id, task_title=task.title)
+        if task.status != old_status:
+            adjust_task_stats(Counter({(user.id, old_status, task.team_visible): -1,
+                                       (user.id, task.status, task.team_visible): 1}))
         db.session.commit()
+        invalidate_tasks(user.id)
+        
+        if task.team_visible:
+            publish_task_event('task.updated', task_event_payload(task, user.username))
         
         flash('Task updated successfully!')
         return redirect(url_for('dashboard'))
@@ -381,33 +1296,218 @@ def edit_task(task_id):
 
 @app.route('/delete_task/<int:task_id>')
 def delete_task(task_id):
-    if 'user_id' not in session:
+    user = current_user()
+    if user is None:
         flash('Please login first')
         return redirect(url_for('login'))
     
-    task = Task.query.get_or_404(task_id)
+    # Locked, so a concurrent delete waits and then finds nothing instead of counting the task twice
+    task = Task.query.filter_by(id=task_id).with_for_update().first_or_404()
     
     # Check if the task belongs to the logged-in user
-    if task.user_id != session['user_id']:
+    if task.user_id != user.id:
         flash('You are not authorized to delete this task')
         return redirect(url_for('dashboard'))
     
     task_title = task.title
+    status = task.status
+    team_visible = task.team_visible
     db.session.delete(task)
-    db.session.commit()
     
     # Log activity
-    activity = UserActivity(
-        user_id=session['user_id'],
-        activity_type='deleted',
-        task_title=task_title
-    )
-    db.session.add(activity)
+    activity_logger.log(user.id, 'deleted', task_title=task_title)
+    adjust_task_stats(Counter({(user.id, status, team_visible): -1}))
     db.session.commit()
+    invalidate_tasks(user.id)
+    
+    if team_visible:
+        publish_task_event('task.deleted', {'id': task_id})
     
     flash('Task deleted successfully!')
     return redirect(url_for('dashboard'))
 
+# Bulk task operations
+TASK_BATCH_OPS = ('create', 'update', 'move', 'delete')
+TASK_EDITABLE_FIELDS = ('title', 'description', 'status', 'priority')
+
+def validate_task_fields(fields, require_title):
+    """Return an error message for invalid task fields, or None."""
+    title = fields.get('title')
+    if require_title or 'title' in fields:
+        if not isinstance(title, str) or not title.strip():
+            return 'Title is required'
+        if len(title) > 100:
+            return 'Title must be at most 100 characters'
+    if 'description' in fields and fields['description'] is not None and not isinstance(fields['description'], str):
+        return 'Description must be a string'
+    if 'status' in fields and fields['status'] not in TASK_STATUSES:
+        return 'Invalid status'
+    if 'priority' in fields and fields['priority'] not in TASK_PRIORITIES:
+        return 'Invalid priority'
+    return None
+
+def apply_task_batch(user_id, operations):
+    """Apply a list of task operations for one user in a single transaction.
+
+    Operations are validated individually; invalid ones are reported and
+    skipped while the rest are applied with one statement per kind: a bulk
+    INSERT for creates, a bulk UPDATE by primary key for updates, one
+    ``UPDATE ... WHERE id IN (...)`` per target status for moves and one
+    ``DELETE ... WHERE id IN (...)`` for deletes. Returns per-item results in
+    request order.
+    """
+    results = [None] * len(operations)
+    creates, updates, moves, deletes = [], [], {}, []
+
+    # Look up every referenced task the user owns in one query, locked until the batch
+    # commits so task_stats deltas computed from these rows stay exact under concurrent writes
+    referenced = {op['id'] for op in operations
+                  if isinstance(op, dict) and op.get('op') != 'create' and isinstance(op.get('id'), int)}
+    owned = {}
+    if referenced:
+        owned = {row.id: row for row in db.session.query(
+            Task.id, Task.title, Task.status, Task.team_visible
+        ).filter(Task.id.in_(referenced), Task.user_id == user_id).order_by(Task.id).with_for_update()}
+
+    seen = set()
+    for index, op in enumerate(operations):
+        kind = op.get('op') if isinstance(op, dict) else None
+        if kind not in TASK_BATCH_OPS:
+            results[index] = {'ok': False, 'error': 'Unknown operation'}
+            continue
+        if kind == 'create':
+            fields = {key: op.get(key) for key in TASK_EDITABLE_FIELDS}
+            fields['status'] = fields['status'] or 'to_do'
+            fields['priority'] = fields['priority'] or 'medium'
+            error = validate_task_fields(fields, require_title=True)
+            if error:
+                results[index] = {'ok': False, 'error': error}
+            else:
+                creates.append((index, fields))
+            continue
+
+        task_id = op.get('id')
+        if not isinstance(task_id, int) or task_id not in owned:
+            results[index] = {'ok': False, 'id': task_id, 'error': 'Task not found'}
+            continue
+        if task_id in seen:
+            results[index] = {'ok': False, 'id': task_id, 'error': 'Task appears more than once in the batch'}
+            continue
+        seen.add(task_id)
+
+        if kind == 'update':
+            fields = {key: op[key] for key in TASK_EDITABLE_FIELDS if key in op}
+            error = validate_task_fields(fields, require_title=False) if fields else 'No fields to update'
+            if error:
+                results[index] = {'ok': False, 'id': task_id, 'error': error}
+            else:
+                updates.append((index, task_id, fields))
+        elif kind == 'move':
+            if op.get('status') not in TASK_STATUSES:
+                results[index] = {'ok': False, 'id': task_id, 'error': 'Invalid status'}
+            else:
+                moves.setdefault(op['status'], []).append((index, task_id))
+        else:
+            deletes.append((index, task_id))
+
+    activities = []
+    stats = Counter()
+
+    def move_stats(task_id, status):
+        task = owned[task_id]
+        stats[(user_id, task.status, task.team_visible)] -= 1
+        stats[(user_id, status, task.team_visible)] += 1
+
+    if creates:
+        new_ids = db.session.scalars(
+            db.insert(Task).returning(Task.id, sort_by_parameter_order=True),
+            [dict(fields, user_id=user_id) for _, fields in creates]
+        ).all()
+        for (index, fields), task_id in zip(creates, new_ids):
+            results[index] = {'ok': True, 'id': task_id}
+            activities.append({'user_id': user_id, 'activity_type': 'added', 'task_id': task_id, 'task_title': fields['title']})
+            stats[(user_id, fields['status'], True)] += 1  # new tasks are team-visible by default
+    if updates:
+        db.session.execute(db.update(Task), [dict(fields, id=task_id) for _, task_id, fields in updates])
+        for index, task_id, fields in updates:
+            results[index] = {'ok': True, 'id': task_id}
+            if 'status' in fields:
+                move_stats(task_id, fields['status'])
+            activities.append({'user_id': user_id, 'activity_type': 'modified', 'task_id': task_id,
+                               'task_title': fields.get('title', owned[task_id].title)})
+    for status, items in moves.items():
+        db.session.execute(
+            db.update(Task).where(Task.id.in_([task_id for _, task_id in items]), Task.user_id == user_id)
+            .values(status=status).execution_options(synchronize_session=False)
+        )
+        for index, task_id in items:
+            results[index] = {'ok': True, 'id': task_id}
+            activities.append({'user_id': user_id, 'activity_type': 'modified', 'task_id': task_id,
+                               'task_title': owned[task_id].title})
+            move_stats(task_id, status)
+    deleted = set()
+    if deletes:
+        # Count what was actually deleted, not what was read earlier
+        rows = db.session.execute(
+            db.delete(Task).where(Task.id.in_([task_id for _, task_id in deletes]), Task.user_id == user_id)
+            .returning(Task.id, Task.status, Task.team_visible).execution_options(synchronize_session=False)
+        ).all()
+        for row in rows:
+            deleted.add(row.id)
+            stats[(user_id, row.status, row.team_visible)] -= 1
+        for index, task_id in deletes:
+            if task_id not in deleted:
+                results[index] = {'ok': False, 'id': task_id, 'error': 'Task not found'}
+                continue
+            results[index] = {'ok': True, 'id': task_id}
+            # Single deletes do not record the id either; the row is gone
+            activities.append({'user_id': user_id, 'activity_type': 'deleted', 'task_id': None,
+                               'task_title': owned[task_id].title})
+
+    activity_logger.log_many(activities)
+    adjust_task_stats(stats)
+    db.session.commit()
+    if activities:
+        invalidate_tasks(user_id)
+
+    # Tell teammates what changed: created and updated rows are re-read in one query
+    created = {results[index]['id'] for index, _ in creates}
+    changed = [r['id'] for r in results if r['ok'] and r['id'] not in deleted]
+    for row in load_task_event_rows(changed):
+        event_type = 'task.created' if row.id in created else 'task.updated'
+        publish_task_event(event_type, task_event_payload(row, row.owner_username))
+    for task_id in deleted:
+        if owned[task_id].team_visible:
+            publish_task_event('task.deleted', {'id': task_id})
+
+    return results
+
+def load_task_event_rows(task_ids):
+    """Load team-visible tasks with owner usernames for event payloads."""
+    if not task_ids:
+        return []
+    return db.session.query(
+        Task.id, Task.title, Task.status, Task.updated_at, Task.user_id,
+        User.username.label('owner_username')
+    ).join(User, Task.user_id == User.id).filter(Task.id.in_(task_ids), Task.team_visible == True).all()
+
+@app.route('/tasks/batch', methods=['POST'])
+def task_batch():
+    user = current_user()
+    if user is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > app.config['TASK_BATCH_MAX_OPERATIONS']:
+        return jsonify({'error': f"At most {app.config['TASK_BATCH_MAX_OPERATIONS']} operations per batch"}), 400
+    
+    results = apply_task_batch(user.id, operations)
+    
+    return jsonify({'results': [dict(result, index=index) for index, result in enumerate(results)]})
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
@@ -0,0 +1,86 @@
+import argparse
+from datetime import date, datetime, timedelta
+
+from app import app, db, ChatMessage, ChatMessageArchive, chat_namespace, invalidate_cache
+from migrations import require_tables
+
+ARCHIVE_COLUMNS = ('id', 'sender_id', 'receiver_id', 'message', 'timestamp')
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+def ensure_partitions(first, last):
+    """Create the monthly chat_messages_archive partitions covering first..last (Postgres only)."""
+    month = date(first.year, first.month, 1)
+    while month <= last.date():
+        db.session.execute(db.text(
+            f"CREATE TABLE IF NOT EXISTS {ChatMessageArchive.__tablename__}_{month:%Y_%m} "
+            f"PARTITION OF {ChatMessageArchive.__tablename__} "
+            f"FOR VALUES FROM ('{month}') TO ('{next_month(month)}')"
+        ))
+        month = next_month(month)
+
+def archive_boundary(cutoff):
+    """Return the id below which messages can be archived, or None if there are none.
+
+    That is the first message that is still inside the window (messages
+    without a timestamp are never archived), so every archived id stays below
+    every id left in chat_messages. Messages sent while the job runs get
+    higher ids and are never picked up. The newest message always stays:
+    SQLite hands out max(id) + 1 for new rows, so emptying the table would
+    let new messages reuse archived ids.
+    """
+    boundary = db.session.scalar(db.select(db.func.min(ChatMessage.id)).where(
+        db.or_(ChatMessage.timestamp >= cutoff, ChatMessage.timestamp.is_(None))))
+    if boundary is None:
+        boundary = db.session.scalar(db.select(db.func.max(ChatMessage.id)))
+    return boundary
+
+def archive_chat(days, batch_size=1000):
+    """Move chat messages older than ``days`` into chat_messages_archive.
+
+    Messages are moved in id order, one batch per transaction (copied, then
+    deleted), so the job can be stopped and rerun safely. Run one instance
+    at a time. Archived messages stay readable through load_chat_messages().
+    """
+    boundary = archive_boundary(datetime.utcnow() - timedelta(days=days))
+    postgres = db.engine.dialect.name == 'postgresql'
+    moved = 0
+
+    while boundary is not None:
+        # Lock the batch so an edit cannot land between the copy and the delete
+        rows = db.session.execute(
+            db.select(ChatMessage.id, ChatMessage.sender_id, ChatMessage.receiver_id, ChatMessage.timestamp)
+            .where(ChatMessage.id < boundary)
+            .order_by(ChatMessage.id).limit(batch_size).with_for_update()
+        ).all()
+        if not rows:
+            break
+
+        ids = [row.id for row in rows]
+        if postgres:
+            ensure_partitions(min(row.timestamp for row in rows), max(row.timestamp for row in rows))
+        db.session.execute(db.insert(ChatMessageArchive).from_select(
+            ARCHIVE_COLUMNS,
+            db.select(*(getattr(ChatMessage, column) for column in ARCHIVE_COLUMNS)).where(ChatMessage.id.in_(ids))
+        ))
+        db.session.execute(db.delete(ChatMessage).where(ChatMessage.id.in_(ids)))
+        db.session.commit()
+        # Cached conversation windows (and their ETags) still show these messages as editable
+        invalidate_cache(['chat:archive'] + sorted({chat_namespace(row.sender_id, row.receiver_id) for row in rows}))
+        moved += len(rows)
+        print(f"Archived {moved} messages...")
+
+    return moved
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Move old chat messages into chat_messages_archive')
+    parser.add_argument('--days', type=int, default=None, help='archive messages older than this (default: CHAT_ARCHIVE_DAYS)')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        require_tables(ChatMessageArchive.__tablename__)
+        days = args.days if args.days is not None else app.config['CHAT_ARCHIVE_DAYS']
+        total = archive_chat(days, args.batch_size)
+        print(f"Archiving complete: {total} messages older than {days} days moved to the archive")
@@ -0,0 +1,380 @@
+"""Load test and benchmark for the main routes.
+
+Seeds a benchmark database with users, tasks, chat messages and activities,
+then drives the real routes one at a time with concurrent logged-in clients
+and reports throughput and latency percentiles per route. Two modes:
+
+- ``client`` calls the app in-process through the Flask test client (no
+  network or server overhead; good for comparing query and template work);
+- ``gunicorn`` starts ``gunicorn bench_app:app`` on a local port with the
+  given workers/threads/worker class and drives it over HTTP, like the
+  Procfile deployment.
+
+``--hold N`` (gunicorn mode) first opens N /events streams, like idle browser
+tabs, and keeps them open during the run. That shows how many concurrent
+connections each worker class can hold and whether the routes keep working
+while they do. Sync workers serve one stream per thread; gevent workers hold
+them all and keep serving.
+
+The benchmark database is BENCH_DATABASE_URL (a scratch SQLite file by
+default) and is dropped and re-seeded on every run; DATABASE_URL is never
+touched. Results are written as JSON with --json and can be compared with a
+previous run using --compare.
+
+    python bench_app.py --users 50 --tasks 20 --messages 5000 --requests 500 --concurrency 8 --json before.json
+    python bench_app.py --mode gunicorn --workers 4 --threads 2 --compare before.json
+    python bench_app.py --mode gunicorn --worker-class gevent --hold 500 --routes dashboard,chat_messages
+"""
+import argparse
+import json
+import os
+import random
+import selectors
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from sqlalchemy.engine import make_url
+
+from scratch import use_checkout_templates, use_scratch_database
+
+# Point the app at the benchmark database before it is imported; gunicorn
+# workers inherit BENCH_DATABASE_URL and so share it
+use_scratch_database('nexusboard-bench-', 'BENCH_DATABASE_URL')
+
+from app import (app, db, User, Task, ChatMessage, UserActivity, adjust_task_stats, password_hasher, TASK_PRIORITIES,
+                 TASK_STATS_REBUILD_SQL, TASK_STATUSES)
+
+use_checkout_templates(app)
+
+BENCH_PASSWORD = 'bench-password'
+
+def seed(users, tasks_per_user, messages, activities, seed_value=1, chunk=5000):
+    """Drop and recreate the schema, then bulk insert the benchmark data."""
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+    # Hash once: every benchmark user shares the password
+    hashed = password_hasher.hash(BENCH_PASSWORD)
+    now = datetime.utcnow()
+
+    def insert(model, rows):
+        for start in range(0, len(rows), chunk):
+            db.session.execute(db.insert(model), rows[start:start + chunk])
+
+    insert(User, [{'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password': hashed}
+                  for i in range(users)])
+    user_ids = db.session.scalars(db.select(User.id).order_by(User.id)).all()
+    # The admin account is normally created on first login; create it up front so concurrent logins do not race
+    db.session.add(User(username='admin', email='admin@nexusboard.com', password=password_hasher.hash('team3'), is_admin=True))
+    insert(Task, [{
+        'title': f'Task {n} of {user_id}',
+        'description': f'Seeded task {n} for load testing',
+        'status': rng.choice(TASK_STATUSES),
+        'priority': rng.choice(TASK_PRIORITIES),
+        'user_id': user_id,
+        'created_at': now - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+        'updated_at': now - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+    } for user_id in user_ids for n in range(tasks_per_user)])
+    insert(ChatMessage, [{
+        'sender_id': rng.choice(user_ids),
+        # Mostly team chat with some direct messages
+        'receiver_id': rng.choice(user_ids) if rng.random() < 0.2 else None,
+        'message': f'Seeded message {n}',
+        'timestamp': now - timedelta(seconds=messages - n),
+    } for n in range(messages)])
+    insert(UserActivity, [{
+        'user_id': rng.choice(user_ids),
+        'activity_type': rng.choice(('added', 'modified', 'deleted')),
+        'task_title': f'Seeded activity {n}',
+        'timestamp': now - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+    } for n in range(activities)])
+    # Bulk inserts bypass the routes that maintain task_stats
+    db.session.execute(db.text(TASK_STATS_REBUILD_SQL))
+    db.session.commit()
+    return user_ids
+
+
+class NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpSession:
+    """A logged-in browser talking to a running server; redirects are not followed."""
+
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def request(self, method, path, form=None, json_body=None):
+        headers, body = {}, None
+        if form is not None:
+            body = urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            with self.opener.open(Request(self.base_url + path, data=body, headers=headers, method=method), timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except HTTPError as e:
+            e.read()
+            return e.code
+        except OSError:
+            return 599  # timed out or connection refused
+
+    def cookie_header(self):
+        return '; '.join(f'{cookie.name}={cookie.value}' for cookie in self.cookies)
+
+
+class ClientSession:
+    """A logged-in browser calling the app in-process through the test client."""
+
+    def __init__(self):
+        self.client = app.test_client()
+
+    def request(self, method, path, form=None, json_body=None):
+        return self.client.open(path, method=method, data=form, json=json_body).status_code
+
+
+def task_ids(user_id, title_prefix=None):
+    with app.app_context():
+        query = db.select(Task.id).where(Task.user_id == user_id).order_by(Task.id)
+        if title_prefix:
+            query = query.where(Task.title.like(f'{title_prefix}%'))
+        return db.session.scalars(query).all()
+
+# Each route: (name, login as admin?, function(session, worker, n) -> HTTP status)
+ROUTES = [
+    ('login', False, lambda s, w, n: s.request('POST', '/login', form={'username': w['username'], 'password': BENCH_PASSWORD})),
+    ('dashboard', False, lambda s, w, n: s.request('GET', '/dashboard')),
+    ('task_management', False, lambda s, w, n: s.request('GET', '/task_management')),
+    ('team_feed', False, lambda s, w, n: s.request('GET', '/team_feed')),
+    ('add_task', False, lambda s, w, n: s.request('POST', '/add_task', form={
+        'title': f"bench-new-{w['index']}-{n}", 'description': 'Added by the benchmark', 'status': 'to_do', 'priority': 'high'})),
+    ('edit_task', False, lambda s, w, n: s.request('POST', f"/edit_task/{w['tasks'][n % len(w['tasks'])]}", form={
+        'title': f"Edited {n}", 'description': 'Edited by the benchmark', 'status': 'in_progress', 'priority': 'low'})),
+    ('delete_task', False, lambda s, w, n: s.request('GET', f"/delete_task/{w['new_tasks'][n]}")),
+    ('send_message', False, lambda s, w, n: s.request('POST', '/send_message', json_body={'message': f"bench message {n}"})),
+    ('chat_messages', False, lambda s, w, n: s.request('GET', '/chat/messages?conversation=team')),
+    ('team_chat', False, lambda s, w, n: s.request('GET', '/team_chat')),
+    ('admin_dashboard', True, lambda s, w, n: s.request('GET', '/admin_dashboard')),
+]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def run_route(name, as_admin, func, workers, requests, new_session):
+    """Send ``requests`` requests to one route from len(workers) concurrent sessions."""
+    def log_in(worker):
+        session = new_session()
+        username, password = ('admin', 'team3') if as_admin else (worker['username'], BENCH_PASSWORD)
+        status = session.request('POST', '/login', form={'username': username, 'password': password})
+        if status >= 400:
+            raise RuntimeError(f'Login failed for {username}: {status}')
+        return session
+
+    def worker_loop(worker, session):
+        latencies, errors = [], 0
+        for n in range(worker['share']):
+            start = time.perf_counter()
+            status = func(session, worker, n)
+            latencies.append(time.perf_counter() - start)
+            errors += status >= 400
+        return latencies, errors
+
+    for index, worker in enumerate(workers):
+        worker['share'] = requests // len(workers) + (index < requests % len(workers))
+    with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+        # Log every client in first so the timed section only covers the route itself
+        sessions = list(pool.map(log_in, workers))
+        start = time.perf_counter()
+        outcomes = list(pool.map(worker_loop, workers, sessions))
+        wall = time.perf_counter() - start
+
+    latencies = [latency for worker_latencies, _ in outcomes for latency in worker_latencies]
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in outcomes),
+        'requests_per_sec': round(len(latencies) / wall, 2),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+    }
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_gunicorn(port, workers, threads, worker_class='sync', extra_args=()):
+    command = [sys.executable, '-m', 'gunicorn', 'bench_app:app', '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers), '--threads', str(threads), '--worker-class', worker_class,
+               '--log-level', 'warning', *extra_args]
+    # gunicorn also reads gunicorn.conf.py; the environment sizes the app's connection pools to match
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              env=dict(os.environ, WEB_CONCURRENCY=str(workers), WEB_THREADS=str(threads),
+                                       WEB_WORKER_CLASS=worker_class))
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('gunicorn did not start within 30 seconds')
+
+def hold_streams(port, cookie, count, timeout=10):
+    """Open ``count`` /events streams; returns the sockets and how many got a response within ``timeout``."""
+    request = f'GET /events HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\n\r\n'.encode()
+    selector = selectors.DefaultSelector()
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port), timeout=timeout)
+        sock.sendall(request)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        sockets.append(sock)
+    established = 0
+    deadline = time.monotonic() + timeout
+    while established < count and time.monotonic() < deadline:
+        for key, _ in selector.select(timeout=max(0, deadline - time.monotonic())):
+            selector.unregister(key.fileobj)
+            established += key.fileobj.recv(4096).startswith(b'HTTP/1.1 200')
+    selector.close()
+    return sockets, established
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_comparison(results, baseline):
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    print(f"{'route':<18}{'req/s':>12}{'p95 ms':>12}")
+    for name, result in results['routes'].items():
+        old = baseline.get('routes', {}).get(name)
+        if not old or 'error' in old or 'error' in result:
+            continue
+        rps = (result['requests_per_sec'] - old['requests_per_sec']) / old['requests_per_sec'] * 100 if old['requests_per_sec'] else 0
+        p95 = (result['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0
+        print(f"{name:<18}{rps:>+11.1f}%{p95:>+11.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the main routes against a seeded database')
+    parser.add_argument('--mode', choices=['client', 'gunicorn'], default='client')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=20, help='tasks per user')
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--activities', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the generated data')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=4, help='concurrent clients')
+    parser.add_argument('--routes', help='comma-separated subset of routes to run')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (gunicorn mode)')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker (gunicorn mode)')
+    parser.add_argument('--worker-class', default='sync', help='gunicorn worker class, e.g. sync, gthread, gevent (gunicorn mode)')
+    parser.add_argument('--hold', type=int, default=0, help='open /events streams held during the run (gunicorn mode)')
+    parser.add_argument('--timeout', type=int, default=60, help='seconds before a request counts as an error (gunicorn mode)')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='compare with results from an earlier --json run')
+    args = parser.parse_args()
+
+    if args.concurrency > args.users:
+        parser.error('--concurrency cannot exceed --users (each client logs in as its own user)')
+    if args.hold and args.mode != 'gunicorn':
+        parser.error('--hold needs --mode gunicorn')
+    selected = set(args.routes.split(',')) if args.routes else None
+
+    with app.app_context():
+        user_ids = seed(args.users, args.tasks, args.messages, args.activities, args.seed)
+    workers = [{'index': i, 'username': f'bench{i}', 'user_id': user_ids[i], 'tasks': task_ids(user_ids[i])}
+               for i in range(args.concurrency)]
+
+    server, held = None, []
+    if args.mode == 'gunicorn':
+        port = free_port()
+        server = start_gunicorn(port, args.workers, args.threads, args.worker_class)
+        new_session = lambda: HttpSession(f'http://127.0.0.1:{port}', args.timeout)
+    else:
+        new_session = ClientSession
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        'database': make_url(os.environ['BENCH_DATABASE_URL']).get_backend_name(),
+        'settings': vars(args),
+        'routes': {},
+    }
+    try:
+        if args.hold:
+            # The streams belong to a user who is not one of the benchmark clients
+            listener = new_session()
+            listener.request('POST', '/login', form={'username': f'bench{args.users - 1}', 'password': BENCH_PASSWORD})
+            start = time.perf_counter()
+            held, established = hold_streams(port, listener.cookie_header(), args.hold)
+            results['streams'] = {'held': args.hold, 'established': established,
+                                  'seconds': round(time.perf_counter() - start, 2)}
+            print(f"/events streams: {established}/{args.hold} established in {results['streams']['seconds']}s")
+        print(f"{'route':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, as_admin, func in ROUTES:
+            if selected and name not in selected:
+                continue
+            if name == 'delete_task':
+                # Delete the tasks the add_task phase created, or seed a batch to delete
+                for worker in workers:
+                    worker['new_tasks'] = task_ids(worker['user_id'], f"bench-new-{worker['index']}-")
+                if min(len(worker['new_tasks']) for worker in workers) < args.requests // len(workers) + 1:
+                    with app.app_context():
+                        rows = [{'title': f"bench-new-{worker['index']}-x{n}", 'status': 'to_do', 'user_id': worker['user_id']}
+                                for worker in workers for n in range(args.requests // len(workers) + 1)]
+                        db.session.execute(db.insert(Task), rows)
+                        # Count them as add_task would, so the deletes leave task_stats balanced
+                        adjust_task_stats(Counter((row['user_id'], row['status'], True) for row in rows))
+                        db.session.commit()
+                    for worker in workers:
+                        worker['new_tasks'] = task_ids(worker['user_id'], f"bench-new-{worker['index']}-")
+            try:
+                result = run_route(name, as_admin, func, workers, args.requests, new_session)
+            except RuntimeError as e:
+                # e.g. no worker free to log the clients in while streams are held
+                print(f"{name:<18}{e}")
+                results['routes'][name] = {'error': str(e)}
+                continue
+            results['routes'][name] = result
+            print(f"{name:<18}{result['requests_per_sec']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                  f"{result['p99_ms']:>10}{result['errors']:>8}")
+    finally:
+        for sock in held:
+            sock.close()
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
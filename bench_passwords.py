@@ -0,0 +1,92 @@
+"""Login throughput benchmark for the password hashing settings.
+
+Drives POST /login through the Flask test client against a throwaway SQLite
+database, once per hashing setting, and reports logins/sec and latency
+percentiles for one worker process. --threads simulates a threaded worker.
+
+    python bench_passwords.py --logins 50 --threads 4
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scratch import use_scratch_database
+
+# Point the app at a scratch database before it is imported
+use_scratch_database('nexusboard-bench-')
+
+from app import app, db, User, password_hasher
+
+SETTINGS = [
+    {'PASSWORD_HASH_METHOD': 'pbkdf2:sha256', 'PASSWORD_HASH_ITERATIONS': 600000},
+    {'PASSWORD_HASH_METHOD': 'pbkdf2:sha256', 'PASSWORD_HASH_ITERATIONS': 260000},
+    {'PASSWORD_HASH_METHOD': 'pbkdf2:sha256', 'PASSWORD_HASH_ITERATIONS': 100000},
+    {'PASSWORD_HASH_METHOD': 'scrypt', 'PASSWORD_SCRYPT_N': 32768, 'PASSWORD_SCRYPT_R': 8, 'PASSWORD_SCRYPT_P': 1},
+    {'PASSWORD_HASH_METHOD': 'scrypt', 'PASSWORD_SCRYPT_N': 16384, 'PASSWORD_SCRYPT_R': 8, 'PASSWORD_SCRYPT_P': 1},
+]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def login_once(username, password):
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.post('/login', data={'username': username, 'password': password})
+    elapsed = time.perf_counter() - start
+    if '/dashboard' not in response.headers.get('Location', ''):
+        raise RuntimeError(f'Login failed for {username}')
+    return elapsed
+
+def run_setting(setting, logins, threads, workers):
+    app.config.update(setting, PASSWORD_HASH_WORKERS=workers)
+    password_hasher.configure(app.config)
+
+    with app.app_context():
+        User.query.filter(User.username.like('bench%')).delete(synchronize_session=False)
+        db.session.add_all([
+            User(username=f'bench{i}', email=f'bench{i}@example.com', password=password_hasher.hash('bench-password'))
+            for i in range(threads)
+        ])
+        db.session.commit()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(lambda i: login_once(f'bench{i % threads}', 'bench-password'), range(logins)))
+    wall = time.perf_counter() - start
+
+    return {
+        'method': password_hasher.method,
+        'threads': threads,
+        'hash_workers': workers,
+        'logins': logins,
+        'logins_per_sec': round(logins / wall, 2),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark login throughput per password hashing setting')
+    parser.add_argument('--logins', type=int, default=30, help='logins per setting')
+    parser.add_argument('--threads', type=int, default=1, help='concurrent logins in this worker')
+    parser.add_argument('--hash-workers', type=int, default=0, help='PASSWORD_HASH_WORKERS to use')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+
+    results = []
+    print(f"{'method':<28}{'logins/sec':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for setting in SETTINGS:
+        result = run_setting(setting, args.logins, args.threads, args.hash_workers)
+        results.append(result)
+        print(f"{result['method']:<28}{result['logins_per_sec']:>12}{result['p50_ms']:>10}{result['p99_ms']:>10}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
@@ -0,0 +1,201 @@
+"""Server-side cache for per-user board data and the team feed.
+
+Entries are stored under versioned keys: every namespace (for example
+``board:42`` or ``team``) has a version stamp that mutation routes bump, and
+readers only look up keys built from the current stamp. A bump therefore
+invalidates every entry in the namespace at once, and a reader that loaded
+data just before a bump can only store it under the stale version.
+
+Backends:
+
+- 'memory' is an in-process LRU with a TTL. Version stamps are stored in it
+  like entries, so they expire too. With several workers, bumps are shared
+  through the event bus; a worker that misses one (or the broker being down)
+  serves stale entries and ETags for at most the TTL.
+- 'redis' keeps entries and versions in Redis (requires the ``redis``
+  package) so all workers share them.
+- 'none' caches nothing; every read goes to the database and ETags change
+  on every request. It is the default for several workers without a broker
+  event bus, where a 'memory' cache would keep serving a worker's stale
+  data after a write handled by another worker.
+"""
+import pickle
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds."""
+
+    shared = False
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return ``(found, value)``."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            expires, value = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class NullCache:
+    """Backend that stores nothing, for deployments where no cache can be kept consistent."""
+
+    shared = False
+
+    def get(self, key):
+        return False, None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class RedisCache:
+    """Cache backend shared by all workers through Redis."""
+
+    shared = True
+
+    def __init__(self, url, ttl=60, prefix='nexusboard:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND='redis' requires the redis package") from e
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return False, None
+        return True, pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=self.ttl if ttl is None else ttl)
+
+    def counter(self, key):
+        # Seed missing counters randomly so a flushed Redis cannot repeat old values
+        self.client.set(self.prefix + key, random.getrandbits(48), nx=True)
+        return int(self.client.get(self.prefix + key))
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def __len__(self):
+        return self.client.dbsize()
+
+
+class VersionedCache:
+    """Namespaced, version-stamped cache with hit/miss counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def version(self, namespace):
+        """Return the namespace's current version stamp.
+
+        In-process stamps are random tokens rather than counters, so two
+        processes (or one process before and after a restart) never hand out
+        the same stamp for different data. They expire after the cache TTL,
+        so a stamp that missed a bump is replaced within that time. That makes
+        them safe to use in ETags.
+        """
+        key = f'version:{namespace}'
+        if self.backend.shared:
+            return str(self.backend.counter(key))
+        with self._lock:
+            found, stamp = self.backend.get(key)
+            if not found:
+                stamp = uuid.uuid4().hex
+                self.backend.set(key, stamp)
+            return stamp
+
+    def bump(self, namespace):
+        """Invalidate every entry in ``namespace``."""
+        key = f'version:{namespace}'
+        if self.backend.shared:
+            self.backend.incr(key)
+            return
+        with self._lock:
+            self.backend.set(key, uuid.uuid4().hex)
+
+    def get_or_load(self, namespace, key, loader):
+        """Return the cached value for ``key`` or compute and store it with ``loader``."""
+        full_key = f'{namespace}:v{self.version(namespace)}:{key}'
+        found, value = self.backend.get(full_key)
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if found:
+            return value
+        value = loader()
+        self.backend.set(full_key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0.0,
+            'entries': len(self.backend)
+        }
+
+
+def create_cache(config):
+    """Build the board cache selected by ``CACHE_BACKEND``."""
+    backend = config.get('CACHE_BACKEND', 'memory')
+    ttl = config.get('CACHE_TTL', 60)
+    if backend == 'memory':
+        if config.get('WEB_CONCURRENCY', 1) > 1 and config.get('EVENT_BUS_BACKEND', 'memory') != 'broker':
+            raise ValueError("CACHE_BACKEND='memory' with several workers needs EVENT_BUS_BACKEND='broker' "
+                             "so every worker sees invalidations; use 'redis' or 'none' otherwise")
+        return VersionedCache(LRUCache(config.get('CACHE_MAX_ENTRIES', 1024), ttl))
+    if backend == 'redis':
+        return VersionedCache(RedisCache(config['CACHE_REDIS_URL'], ttl))
+    if backend == 'none':
+        return VersionedCache(NullCache())
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
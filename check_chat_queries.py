@@ -0,0 +1,97 @@
+"""Query-count regression check for the chat loading paths.
+
+Seeds a throwaway SQLite database with chat messages from many users, then
+renders /team_chat and /chat/messages and loads ChatMessage objects with
+their senders and receivers, each at two history sizes. The number of SQL
+statements must stay within a fixed bound and must not grow with the number
+of messages. Exits non-zero on a regression, so it can run in CI.
+
+    python check_chat_queries.py --messages 10 200
+"""
+import argparse
+import sys
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from scratch import use_checkout_templates, use_scratch_database
+
+# Point the app at a scratch database before it is imported
+use_scratch_database('nexusboard-check-')
+
+from app import app, db, User, ChatMessage, password_hasher, board_cache, identity_cache
+
+use_checkout_templates(app)
+
+# Statements one request may issue: identity lookup plus the page's own queries
+MAX_QUERIES = 5
+
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+
+def seed(message_count, user_count=20):
+    db.drop_all()
+    db.create_all()
+    users = [User(username=f'user{i}', email=f'user{i}@example.com', password=password_hasher.hash('pw'))
+             for i in range(user_count)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([
+        ChatMessage(sender_id=users[i % user_count].id,
+                    receiver_id=None if i % 2 else users[(i + 1) % user_count].id,
+                    message=f'message {i}')
+        for i in range(message_count * 2)
+    ])
+    db.session.commit()
+    return users[0].id
+
+def count(func, user_id):
+    """Run func with cold caches and return the number of SQL statements it issued."""
+    board_cache.bump('chat:team')
+    board_cache.bump('chat:archive')
+    identity_cache.delete(user_id)
+    statements.clear()
+    func()
+    return len(statements)
+
+def measure(message_count):
+    with app.app_context():
+        user_id = seed(message_count)
+    app.config.update(CHAT_PAGE_SIZE=message_count, CHAT_MAX_PAGE_SIZE=message_count)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+
+    def render_team_chat():
+        response = client.get('/team_chat')
+        assert response.status_code == 200, response.status_code
+
+    def fetch_messages():
+        response = client.get(f'/chat/messages?conversation=team&limit={message_count}')
+        assert len(response.json['messages']) == message_count, len(response.json['messages'])
+
+    def load_orm_messages():
+        with app.app_context():
+            messages = ChatMessage.query.order_by(ChatMessage.id.desc()).limit(message_count).all()
+            [(m.sender.username, m.receiver.username if m.receiver else None) for m in messages]
+
+    return {
+        'team_chat': count(render_team_chat, user_id),
+        'chat_messages': count(fetch_messages, user_id),
+        'orm_sender_receiver': count(load_orm_messages, user_id),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check that chat loading issues a bounded number of queries')
+    parser.add_argument('--messages', type=int, nargs=2, default=[10, 200], metavar=('SMALL', 'LARGE'),
+                        help='history sizes to compare')
+    args = parser.parse_args()
+
+    small, large = (measure(n) for n in args.messages)
+    failed = False
+    print(f"{'path':<24}{args.messages[0]:>10}{args.messages[1]:>10}")
+    for path in small:
+        ok = small[path] == large[path] and large[path] <= MAX_QUERIES
+        failed |= not ok
+        print(f"{path:<24}{small[path]:>10}{large[path]:>10}  {'ok' if ok else 'FAIL'}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,56 @@
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app import app, db, UserActivity, UserActivityRollup
+from migrations import require_tables
+
+def compact_activities(retention_days, batch_size=1000):
+    """Roll activities older than the retention window up into daily counts.
+
+    Rows are processed in id order, one batch per transaction, so the job can
+    be stopped and rerun safely. Run one instance at a time.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    compacted = 0
+
+    while True:
+        rows = db.session.query(
+            UserActivity.id, UserActivity.user_id, UserActivity.activity_type, UserActivity.timestamp
+        ).filter(UserActivity.timestamp < cutoff).order_by(UserActivity.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        counts = Counter((row.user_id, row.timestamp.date(), row.activity_type) for row in rows)
+
+        # Fold the batch into any rollup rows that already exist for those keys
+        existing = UserActivityRollup.query.filter(
+            UserActivityRollup.user_id.in_({key[0] for key in counts}),
+            UserActivityRollup.day.in_({key[1] for key in counts})
+        ).all()
+        rollups = {(r.user_id, r.day, r.activity_type): r for r in existing}
+        for key, count in counts.items():
+            if key in rollups:
+                rollups[key].count += count
+            else:
+                user_id, day, activity_type = key
+                db.session.add(UserActivityRollup(user_id=user_id, day=day, activity_type=activity_type, count=count))
+
+        UserActivity.query.filter(UserActivity.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+        db.session.commit()
+        compacted += len(rows)
+        print(f"Compacted {compacted} activities...")
+
+    return compacted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compact old user activities into per-user daily counts')
+    parser.add_argument('--days', type=int, default=None, help='retention window (default: ACTIVITY_RETENTION_DAYS)')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        require_tables(UserActivityRollup.__tablename__)
+        days = args.days if args.days is not None else app.config['ACTIVITY_RETENTION_DAYS']
+        total = compact_activities(days, args.batch_size)
+        print(f"Compaction complete: {total} activities older than {days} days rolled up")
@@ -0,0 +1,215 @@
+"""In-process pub/sub bus feeding the /events Server-Sent Events stream.
+
+Routes publish small JSON deltas to named channels ('team' or 'user:<id>')
+and each open SSE connection holds a Subscriber with a bounded queue. A
+subscriber that falls behind is evicted rather than allowed to grow without
+bound; its stream closes and the browser reconnects and resyncs.
+
+Two backends are available:
+
+- MemoryBackend delivers within the current process. Use it with a single
+  gunicorn worker or the Flask dev server.
+- BrokerBackend relays every event through a small TCP broker so that all
+  gunicorn workers see it. Start the broker with ``python events.py``.
+"""
+import argparse
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+
+class Subscriber:
+    """A bounded queue of events for one client connection."""
+
+    def __init__(self, channels, maxsize):
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.evicted = False
+
+    def put(self, event):
+        """Queue an event; returns False if the subscriber had to be evicted."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.evict()
+            return False
+
+    def evict(self):
+        # Drop the backlog and leave a sentinel so the reader wakes up and stops
+        self.evicted = True
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        """Wait for the next event; returns None on timeout or eviction."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MemoryBackend:
+    """Event bus delivering to subscribers in the current process only."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscriber = Subscriber(channels, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def add_listener(self, channel, callback):
+        """Call ``callback(event)`` in-process for every event on ``channel``."""
+        with self._lock:
+            self._listeners.setdefault(channel, []).append(callback)
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        with self._lock:
+            listeners = list(self._listeners.get(channel, ()))
+            subscribers = [s for s in self._subscribers if channel in s.channels]
+        for callback in listeners:
+            callback(event)
+        for subscriber in subscribers:
+            if not subscriber.put(event):
+                self.unsubscribe(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+class BrokerBackend(MemoryBackend):
+    """Event bus shared between worker processes through a local TCP broker.
+
+    Published events are sent to the broker, which echoes them to every
+    connected worker (including this one) for local delivery. While the
+    broker is unreachable events are delivered locally only.
+    """
+
+    def __init__(self, address, queue_size=100, reconnect_delay=1.0):
+        super().__init__(queue_size)
+        self.address = address
+        self.reconnect_delay = reconnect_delay
+        self._sock = None
+        self._send_lock = threading.Lock()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def publish(self, channel, event):
+        line = json.dumps({'channel': channel, 'event': event}).encode() + b'\n'
+        with self._send_lock:
+            sock = self._sock
+            if sock is not None:
+                try:
+                    sock.sendall(line)
+                    return
+                except OSError:
+                    self._sock = None
+        self.deliver(channel, event)
+
+    def _read_loop(self):
+        while True:
+            try:
+                sock = socket.create_connection(self.address)
+            except OSError:
+                time.sleep(self.reconnect_delay)
+                continue
+            with self._send_lock:
+                self._sock = sock
+            try:
+                for line in sock.makefile('rb'):
+                    payload = json.loads(line)
+                    self.deliver(payload['channel'], payload['event'])
+            except (OSError, ValueError):
+                pass
+            finally:
+                with self._send_lock:
+                    if self._sock is sock:
+                        self._sock = None
+                sock.close()
+            time.sleep(self.reconnect_delay)
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def create_event_bus(config):
+    """Build the event bus selected by ``EVENT_BUS_BACKEND``."""
+    backend = config.get('EVENT_BUS_BACKEND', 'memory')
+    queue_size = config.get('EVENT_QUEUE_SIZE', 100)
+    if backend == 'memory':
+        return MemoryBackend(queue_size)
+    if backend == 'broker':
+        return BrokerBackend(parse_address(config['EVENT_BROKER_ADDRESS']), queue_size)
+    raise ValueError(f"Unknown EVENT_BUS_BACKEND: {backend}")
+
+
+def format_sse(event):
+    """Format an event dict as a Server-Sent Events frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.clients.add(self.wfile)
+        try:
+            for line in self.rfile:
+                # Writes are serialized so lines from different workers never interleave
+                with server.lock:
+                    for client in list(server.clients):
+                        try:
+                            client.write(line)
+                            client.flush()
+                        except OSError:
+                            server.clients.discard(client)
+        finally:
+            with server.lock:
+                server.clients.discard(self.wfile)
+
+
+class Broker(socketserver.ThreadingTCPServer):
+    """Fan-out relay: every line received is sent to every connected worker."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, _BrokerHandler)
+        self.clients = set()
+        self.lock = threading.Lock()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the local event broker for multi-worker deployments')
+    parser.add_argument('--address', default='127.0.0.1:8765', help='host:port to listen on')
+    args = parser.parse_args()
+
+    with Broker(parse_address(args.address)) as broker:
+        print(f"Event broker listening on {args.address}")
+        broker.serve_forever()
@@ -0,0 +1,41 @@
+import argparse
+import sys
+
+from werkzeug.datastructures import MultiDict
+
+from app import app, db, EXPORT_DATASETS, export_query, parse_activity_filters
+from exports import EXPORT_FORMATS, stream_export
+
+def export_data(dataset, fmt, filters, out, batch_size):
+    """Stream one dataset to ``out`` a batch at a time."""
+    for chunk in stream_export(db.session, export_query(dataset, filters), fmt, batch_size):
+        out.write(chunk)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export tasks, chat messages or activities as CSV or JSON Lines')
+    parser.add_argument('dataset', choices=sorted(EXPORT_DATASETS))
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--user-id', type=int, help="only this user's rows (either side of a chat message)")
+    parser.add_argument('--start', help='first day, YYYY-MM-DD')
+    parser.add_argument('--end', help='last day (inclusive), YYYY-MM-DD')
+    parser.add_argument('--activity-type', help='activities only: added, modified or deleted')
+    parser.add_argument('--batch-size', type=int, default=None, help='rows per fetch (default: EXPORT_BATCH_SIZE)')
+    parser.add_argument('-o', '--output', help='file to write (default: stdout)')
+    args = parser.parse_args()
+
+    try:
+        filters = parse_activity_filters(MultiDict({
+            key: value for key, value in (('user_id', args.user_id), ('start', args.start), ('end', args.end),
+                                          ('activity_type', args.activity_type)) if value
+        }))
+    except ValueError as e:
+        parser.error(str(e))
+
+    with app.app_context():
+        batch_size = args.batch_size or app.config['EXPORT_BATCH_SIZE']
+        if args.output:
+            with open(args.output, 'w', newline='', encoding='utf-8') as out:
+                export_data(args.dataset, args.format, filters, out, batch_size)
+            print(f"Exported {args.dataset} to {args.output}", file=sys.stderr)
+        else:
+            export_data(args.dataset, args.format, filters, sys.stdout, batch_size)
@@ -0,0 +1,55 @@
+"""Streaming CSV and JSON Lines exports.
+
+Rows are read with ``yield_per``, so only one batch is held in memory at a
+time. On Postgres this makes psycopg2 use a named server-side cursor; on
+SQLite the cursor is read lazily anyway. Each batch is encoded into one text
+chunk, which suits a chunked HTTP response and a file alike, so an export of
+any size runs in constant memory.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(columns, batches):
+    """Yield a header line, then one CSV chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_plain(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()  # the header of an empty export
+
+
+def encode_jsonl(columns, batches):
+    """Yield one chunk of newline-delimited JSON objects per batch of rows."""
+    for batch in batches:
+        yield ''.join(json.dumps(dict(zip(columns, map(_plain, row)))) + '\n' for row in batch)
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'jsonl': encode_jsonl,
+}
+
+
+def stream_export(session, query, fmt, batch_size=1000):
+    """Run ``query`` and yield its rows encoded as ``fmt``, ``batch_size`` rows at a time."""
+    result = session.execute(query.execution_options(yield_per=batch_size))
+    return ENCODERS[fmt](list(result.keys()), result.partitions())
@@ -0,0 +1,57 @@
+"""Gunicorn settings, read from the environment.
+
+WEB_WORKER_CLASS picks how a worker process handles concurrent connections:
+
+- ``sync`` (default) or ``gthread``: one request per thread. A slow client
+  keeps its thread busy until it finishes, so WEB_CONCURRENCY x WEB_THREADS
+  connections use up the whole server. Pages therefore poll instead of
+  holding /events streams open (see EVENT_STREAMS in config.py).
+- ``gevent``: every connection runs in a greenlet. Sockets, queues, locks and
+  psycopg2 (patched here with psycogreen) yield to the event loop while they
+  wait, so a worker holds up to WEB_WORKER_CONNECTIONS connections and an idle
+  stream costs a little memory instead of a thread. CPU-bound work still
+  blocks the loop: password hashing is moved onto OS threads (see
+  passwords.py), and SQLite queries block the loop while they run, so use
+  Postgres with gevent in production.
+
+Sizing: WEB_CONCURRENCY is about one worker per CPU for gevent (two for
+sync/gthread). Each worker opens at most DB_MAX_CONNECTIONS / WEB_CONCURRENCY
+database connections (see _pool_options in config.py). A gevent worker keeps
+all of them pooled, and requests beyond that wait up to DB_POOL_TIMEOUT.
+/events streams release their connection before streaming, so they do not
+count against the pool.
+
+    gunicorn -c gunicorn.conf.py app:app
+    WEB_WORKER_CLASS=gevent WEB_CONCURRENCY=2 gunicorn -c gunicorn.conf.py app:app
+
+config.py sizes pools and turns on live updates from these variables, so
+post_fork exports the settings gunicorn actually uses (command-line flags
+such as ``-k gevent`` included) before the worker imports the app. Do not
+enable ``preload_app``, which imports the app before that.
+"""
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('WEB_THREADS', 1))
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'sync')
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', 1000))
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))  # seconds a sync worker may stay busy before it is restarted
+
+
+def post_fork(server, worker):
+    os.environ.update(
+        WEB_CONCURRENCY=str(worker.cfg.workers),
+        WEB_THREADS=str(worker.cfg.threads),
+        WEB_WORKER_CLASS=worker.cfg.worker_class_str,
+        WEB_WORKER_CONNECTIONS=str(worker.cfg.worker_connections),
+        WEB_TIMEOUT=str(worker.cfg.timeout),
+    )
+    if 'gevent' not in worker.cfg.worker_class_str:
+        return
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        return  # SQLite only
+    # Make psycopg2 wait for the database through the event loop instead of blocking the worker
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
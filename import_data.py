@@ -0,0 +1,323 @@
+"""Bulk import of users, tasks and chat messages from CSV or JSON Lines.
+
+Files use the same columns as export_data.py, so an export can be loaded
+into another database (ids are reassigned):
+
+- users: username, email, password (plain text, hashed here) or
+  password_hash (an existing Werkzeug hash), optional is_admin
+- tasks: owner (username) or user_id, title, optional description, status,
+  priority, team_visible, created_at, updated_at
+- chat_messages: sender or sender_id, optional receiver or receiver_id (none
+  for team chat), message, optional timestamp
+
+Rows are read, checked and inserted in batches inside one transaction, so
+an import either loads every valid row or nothing. Each batch looks up
+existing usernames, emails and referenced users with one query per
+column. Postgres loads rows with COPY; other databases use one executemany
+per batch. Passwords are hashed on a process pool. Invalid rows are
+reported with their line numbers and skipped.
+
+    python import_data.py users team.csv
+    python import_data.py tasks tasks.jsonl --batch-size 10000
+    python import_data.py chat_messages chat.csv --dry-run
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice, repeat
+
+from werkzeug.security import generate_password_hash
+
+from app import (app, db, User, Task, ChatMessage, adjust_task_stats, chat_namespace, invalidate_cache,
+                 password_hasher, validate_task_fields)
+
+TRUE_VALUES = ('1', 'true', 'yes', 't', 'y')
+
+def read_rows(path, fmt):
+    """Yield ``(line_number, row)`` pairs; empty values become None."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {key: value if value != '' else None for key, value in row.items()}
+        else:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_number, {key: value if value != '' else None for key, value in json.loads(line).items()}
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+def as_bool(value, default):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+def as_datetime(value, default):
+    """Parse an ISO 8601 timestamp; raises ValueError for anything else, so the row is rejected."""
+    if value is None:
+        return default
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid timestamp {value!r} (expected ISO 8601)") from None
+
+def copy_value(value):
+    """Encode one value for COPY's text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def insert_rows(model, rows):
+    """Insert a batch of attribute dicts with COPY on Postgres, or one executemany elsewhere."""
+    connection = db.session.connection()
+    if connection.dialect.name != 'postgresql':
+        db.session.execute(db.insert(model), rows)
+        return
+    keys = list(rows[0])
+    columns = [model.__mapper__.attrs[key].columns[0] for key in keys]
+    # Apply column types that convert values on the way in (e.g. task priority names to levels)
+    binders = [column.type.process_bind_param if isinstance(column.type, db.TypeDecorator) else None
+               for column in columns]
+    buffer = io.StringIO()
+    for row in rows:
+        values = (bind(row[key], connection.dialect) if bind else row[key] for key, bind in zip(keys, binders))
+        buffer.write('\t'.join(map(copy_value, values)) + '\n')
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    cursor.copy_expert(f"COPY {model.__tablename__} ({', '.join(column.name for column in columns)}) FROM STDIN",
+                       buffer)
+
+def lookup_user_ids(batch, name_key, id_key):
+    """Map the usernames and ids a batch refers to onto existing user ids, one query each."""
+    names = {row[name_key] for _, row in batch if row.get(name_key)}
+    ids = set()
+    for _, row in batch:
+        if not row.get(name_key) and row.get(id_key) is not None:
+            try:
+                ids.add(int(row[id_key]))
+            except (TypeError, ValueError):
+                pass
+    found = {}
+    if names:
+        found.update(db.session.query(User.username, User.id).filter(User.username.in_(names)))
+    if ids:
+        found.update((user_id, user_id) for user_id, in db.session.query(User.id).filter(User.id.in_(ids)))
+    return found
+
+def user_reference(row, name_key, id_key, users):
+    """Return the user id a row refers to, None if it names no user, or raise ValueError."""
+    if row.get(name_key):
+        if row[name_key] not in users:
+            raise ValueError(f"Unknown user {row[name_key]!r}")
+        return users[row[name_key]]
+    if row.get(id_key) is None:
+        return None
+    try:
+        user_id = int(row[id_key])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {id_key}") from None
+    if user_id not in users:
+        raise ValueError(f"Unknown {id_key} {user_id}")
+    return user_id
+
+class Importer:
+
+    def __init__(self, hash_workers=None, dry_run=False):
+        self.hash_workers = hash_workers or os.cpu_count() or 1
+        self.dry_run = dry_run
+        self._hash_pool = None
+        self.usernames = set()
+        self.emails = set()
+        self.hash_seconds = 0.0
+
+    def close(self):
+        if self._hash_pool is not None:
+            self._hash_pool.shutdown()
+
+    def hash_passwords(self, passwords):
+        if not passwords:
+            return []
+        start = time.perf_counter()
+        if self._hash_pool is None:
+            self._hash_pool = ProcessPoolExecutor(max_workers=self.hash_workers)
+        chunksize = max(1, len(passwords) // (self.hash_workers * 4))
+        hashes = list(self._hash_pool.map(generate_password_hash, passwords, repeat(password_hasher.method),
+                                          chunksize=chunksize))
+        self.hash_seconds += time.perf_counter() - start
+        return hashes
+
+    def prepare_users(self, batch):
+        errors, valid = [], []
+        for line, row in batch:
+            username, email = row.get('username'), row.get('email')
+            if not isinstance(username, str) or not username or len(username) > 80:
+                errors.append((line, 'username is required (at most 80 characters)'))
+            elif not isinstance(email, str) or '@' not in email or len(email) > 120:
+                errors.append((line, 'a valid email is required (at most 120 characters)'))
+            elif not row.get('password') and not row.get('password_hash'):
+                errors.append((line, 'password or password_hash is required'))
+            elif row.get('password_hash') and '$' not in row['password_hash']:
+                errors.append((line, 'password_hash must be a Werkzeug hash'))
+            elif username in self.usernames:
+                errors.append((line, f"duplicate username {username!r}"))
+            elif email in self.emails:
+                errors.append((line, f"duplicate email {email!r}"))
+            else:
+                self.usernames.add(username)
+                self.emails.add(email)
+                valid.append((line, row))
+
+        # One query per unique column for the whole batch
+        taken_usernames = set(db.session.scalars(
+            db.select(User.username).where(User.username.in_([row['username'] for _, row in valid]))))
+        taken_emails = set(db.session.scalars(
+            db.select(User.email).where(User.email.in_([row['email'] for _, row in valid]))))
+        accepted = []
+        for line, row in valid:
+            if row['username'] in taken_usernames:
+                errors.append((line, f"username {row['username']!r} already exists"))
+            elif row['email'] in taken_emails:
+                errors.append((line, f"email {row['email']!r} already exists"))
+            else:
+                accepted.append(row)
+        if self.dry_run:
+            return accepted, errors
+
+        # Hashes come back in order, one for each row without a password_hash
+        hashes = iter(self.hash_passwords([row['password'] for row in accepted if not row.get('password_hash')]))
+        return [{
+            'username': row['username'],
+            'email': row['email'],
+            'password': row.get('password_hash') or next(hashes),
+            'is_admin': as_bool(row.get('is_admin'), False),
+        } for row in accepted], errors
+
+    def prepare_tasks(self, batch):
+        users = lookup_user_ids(batch, 'owner', 'user_id')
+        now = datetime.utcnow()
+        rows, errors = [], []
+        for line, row in batch:
+            fields = {
+                'title': row.get('title'),
+                'description': row.get('description'),
+                'status': row.get('status') or 'to_do',
+                'priority': row.get('priority') or 'medium',
+            }
+            try:
+                user_id = user_reference(row, 'owner', 'user_id', users)
+                if user_id is None:
+                    raise ValueError('owner or user_id is required')
+                error = validate_task_fields(fields, require_title=True)
+                if error:
+                    raise ValueError(error)
+                created_at = as_datetime(row.get('created_at'), now)
+                updated_at = as_datetime(row.get('updated_at'), created_at)
+            except ValueError as e:
+                errors.append((line, str(e)))
+                continue
+            rows.append(dict(fields, user_id=user_id, team_visible=as_bool(row.get('team_visible'), True),
+                             created_at=created_at, updated_at=updated_at))
+        return rows, errors
+
+    def prepare_chat_messages(self, batch):
+        users = lookup_user_ids(batch, 'sender', 'sender_id')
+        users.update(lookup_user_ids(batch, 'receiver', 'receiver_id'))
+        now = datetime.utcnow()
+        rows, errors = [], []
+        for line, row in batch:
+            try:
+                sender_id = user_reference(row, 'sender', 'sender_id', users)
+                if sender_id is None:
+                    raise ValueError('sender or sender_id is required')
+                receiver_id = user_reference(row, 'receiver', 'receiver_id', users)
+                if not isinstance(row.get('message'), str) or not row['message'].strip():
+                    raise ValueError('message is required')
+                timestamp = as_datetime(row.get('timestamp'), now)
+            except ValueError as e:
+                errors.append((line, str(e)))
+                continue
+            rows.append({'sender_id': sender_id, 'receiver_id': receiver_id, 'message': row['message'],
+                         'timestamp': timestamp})
+        return rows, errors
+
+    def run(self, dataset, path, fmt, batch_size):
+        """Import one file; returns ``(imported, rejected, seconds)``."""
+        model, prepare = {
+            'users': (User, self.prepare_users),
+            'tasks': (Task, self.prepare_tasks),
+            'chat_messages': (ChatMessage, self.prepare_chat_messages),
+        }[dataset]
+        start = time.perf_counter()
+        imported = rejected = 0
+        affected_namespaces = set()
+        try:
+            for batch in batches(read_rows(path, fmt), batch_size):
+                rows, errors = prepare(batch)
+                for line, reason in errors:
+                    print(f"{path}:{line}: {reason}", file=sys.stderr)
+                rejected += len(errors)
+                if rows and not self.dry_run:
+                    insert_rows(model, rows)
+                    if dataset == 'tasks':
+                        adjust_task_stats(Counter((row['user_id'], row['status'], row['team_visible']) for row in rows))
+                        affected_namespaces.update(f"board:{row['user_id']}" for row in rows)
+                        affected_namespaces.add('team')
+                    elif dataset == 'chat_messages':
+                        affected_namespaces.update(chat_namespace(row['sender_id'], row['receiver_id'])
+                                                   for row in rows)
+                imported += len(rows)
+                elapsed = time.perf_counter() - start
+                print(f"  {imported} rows {'checked' if self.dry_run else 'imported'} "
+                      f"({imported / elapsed:.0f} rows/s)...")
+        except BaseException:
+            db.session.rollback()
+            raise
+        if self.dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+            # Cached boards, feeds and conversations (and their ETags) must not hide the new rows
+            if affected_namespaces:
+                invalidate_cache(sorted(affected_namespaces))
+        return imported, rejected, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bulk import users, tasks or chat messages from CSV or JSON Lines')
+    parser.add_argument('dataset', choices=['users', 'tasks', 'chat_messages'])
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows checked and inserted per batch')
+    parser.add_argument('--hash-workers', type=int, default=None, help='password hashing processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='check every row without importing anything')
+    args = parser.parse_args()
+
+    fmt = args.format or ('jsonl' if args.path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    importer = Importer(args.hash_workers, args.dry_run)
+    try:
+        with app.app_context():
+            imported, rejected, seconds = importer.run(args.dataset, args.path, fmt, args.batch_size)
+    finally:
+        importer.close()
+
+    rate = imported / seconds if seconds else 0
+    print(f"{imported} {args.dataset} {'would be imported' if args.dry_run else 'imported'}, {rejected} rejected "
+          f"in {seconds:.1f}s ({rate:.0f} rows/s)")
+    if importer.hash_seconds:
+        print(f"Password hashing: {importer.hash_seconds:.1f}s on {importer.hash_workers} processes")
+    sys.exit(1 if rejected else 0)
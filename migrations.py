@@ -0,0 +1,292 @@
+"""Versioned schema migrations for Postgres and SQLite.
+
+Each migration is a function registered with ``@migration(version, description)``
+and applied in version order; applied versions are recorded in the
+schema_migrations table. Operations check the live schema first, so every
+migration is safe to rerun and also brings databases made by db.create_all()
+or the old one-off scripts up to date without errors.
+
+Statements run one at a time in autocommit mode rather than in one big
+transaction, so long operations never hold locks on busy tables:
+
+- indexes are built with CREATE INDEX CONCURRENTLY on Postgres (an invalid
+  index left by an interrupted build is dropped and rebuilt);
+- backfills update ``batch_size`` rows per statement;
+- DDL on Postgres gives up after --lock-timeout instead of queueing behind
+  long transactions and blocking everyone else.
+
+A migration interrupted part-way is not recorded and simply runs again.
+
+    python migrations.py status
+    python migrations.py upgrade --dry-run
+    python migrations.py upgrade [--target 0002] [--batch-size 5000]
+"""
+import argparse
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from app import app, db, TASK_SEARCH_DDL, TASK_SEARCH_VECTOR, TASK_STATS_REBUILD_SQL
+
+VERSION_TABLE = 'schema_migrations'
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register a migration function taking an Operations instance."""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+class Operations:
+    """Idempotent, dialect-aware schema operations with a dry-run mode."""
+
+    def __init__(self, connection, dry_run=False, batch_size=1000):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+
+    def _inspector(self):
+        # A fresh inspector each time, so checks see the schema as it is now
+        return sa.inspect(self.connection)
+
+    def has_table(self, table):
+        return self._inspector().has_table(table)
+
+    def has_column(self, table, column):
+        return self.has_table(table) and column in {c['name'] for c in self._inspector().get_columns(table)}
+
+    def execute(self, statement, params=None):
+        statement = str(statement).strip()
+        print(f"  {'[dry-run] ' if self.dry_run else ''}{statement}")
+        if not self.dry_run:
+            return self.connection.execute(sa.text(statement), params or {})
+
+    def create_table(self, table):
+        if self.has_table(table.name):
+            return
+        self.execute(CreateTable(table).compile(dialect=self.connection.dialect))
+
+    def add_column(self, table, column):
+        if self.has_column(table, column.name):
+            return
+        ddl = CreateColumn(column).compile(dialect=self.connection.dialect)
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {ddl}")
+
+    def create_index(self, name, table, columns, unique=False, postgresql_using=None):
+        """Create an index without blocking writes.
+
+        ``columns`` are SQL fragments, e.g. ``['user_id', 'updated_at DESC']``.
+        """
+        unique = 'UNIQUE ' if unique else ''
+        columns = ', '.join(columns)
+        if self.dialect != 'postgresql':
+            self.execute(f"CREATE {unique}INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            return
+        if self._invalid_index(name):
+            self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        using = f" USING {postgresql_using}" if postgresql_using else ''
+        self.execute(f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{using} ({columns})")
+
+    def drop_index(self, name):
+        concurrently = 'CONCURRENTLY ' if self.dialect == 'postgresql' else ''
+        self.execute(f"DROP INDEX {concurrently}IF EXISTS {name}")
+
+    def _invalid_index(self, name):
+        row = self.connection.execute(sa.text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ), {'name': name}).first()
+        return row is not None and not row.indisvalid
+
+    def backfill(self, table, assignments, where):
+        """Run ``UPDATE table SET assignments WHERE where`` in id-ordered batches.
+
+        ``where`` must stop matching a row once it has been updated.
+        """
+        try:
+            pending = self.connection.execute(sa.text(f"SELECT COUNT(*) FROM {table} WHERE {where}")).scalar()
+        except sa.exc.DBAPIError:
+            if not self.dry_run:
+                raise
+            pending = 'all'  # a dry run has not added the columns yet
+        if self.dry_run:
+            print(f"  [dry-run] UPDATE {table} SET {assignments} WHERE {where}"
+                  f" -- {pending} rows in batches of {self.batch_size}")
+            return
+        done = 0
+        while True:
+            result = self.connection.execute(sa.text(
+                f"UPDATE {table} SET {assignments} WHERE id IN "
+                f"(SELECT id FROM {table} WHERE {where} ORDER BY id LIMIT :batch_size)"
+            ), {'batch_size': self.batch_size})
+            if not result.rowcount:
+                break
+            done += result.rowcount
+            print(f"  Backfilled {done}/{pending} {table} rows...")
+
+
+def version_table():
+    return sa.Table(
+        VERSION_TABLE, sa.MetaData(),
+        sa.Column('version', sa.String(32), primary_key=True),
+        sa.Column('description', sa.String(200), nullable=False),
+        sa.Column('applied_at', sa.DateTime, nullable=False),
+    )
+
+def applied_versions(connection):
+    if not sa.inspect(connection).has_table(VERSION_TABLE):
+        return set()
+    return set(connection.execute(sa.select(version_table().c.version)).scalars())
+
+def connect(lock_timeout):
+    connection = db.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+    if connection.dialect.name == 'postgresql' and lock_timeout:
+        connection.execute(sa.text(f"SET lock_timeout = '{lock_timeout}'"))
+    return connection
+
+def pending_migrations(connection, target=None):
+    applied = applied_versions(connection)
+    return [(version, description, func) for version, description, func in sorted(MIGRATIONS)
+            if version not in applied and (target is None or version <= target)]
+
+def upgrade(target=None, dry_run=False, batch_size=1000, lock_timeout='5s'):
+    """Apply pending migrations up to ``target``; returns the versions applied."""
+    with connect(lock_timeout) as connection:
+        ops = Operations(connection, dry_run=dry_run, batch_size=batch_size)
+        table = version_table()
+        ops.create_table(table)
+        applied = []
+        for version, description, func in pending_migrations(connection, target):
+            print(f"{'Would apply' if dry_run else 'Applying'} {version}: {description}")
+            func(ops)
+            if not dry_run:
+                connection.execute(table.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()))
+            applied.append(version)
+        return applied
+
+def status():
+    with connect(None) as connection:
+        applied = applied_versions(connection)
+    for version, description, _ in sorted(MIGRATIONS):
+        print(f"{'applied' if version in applied else 'pending':<9}{version}  {description}")
+
+def require_tables(*tables):
+    """Exit with an error naming any missing table, for scripts that must not create tables themselves."""
+    inspector = sa.inspect(db.engine)
+    missing = [table for table in tables if not inspector.has_table(table)]
+    if missing:
+        raise SystemExit(f"Missing table(s): {', '.join(missing)}. Run 'python migrations.py upgrade' first.")
+
+
+# Migrations
+
+@migration('0001', 'Legacy columns from the one-off migrate_*.py scripts')
+def legacy_columns(ops):
+    ops.add_column('users', sa.Column('is_admin', sa.Boolean, server_default=sa.false()))
+    # SQLite cannot add a column with a CURRENT_TIMESTAMP default, so backfill instead
+    ops.add_column('tasks', sa.Column('created_at', sa.DateTime))
+    ops.add_column('tasks', sa.Column('updated_at', sa.DateTime))
+    ops.backfill('tasks', 'created_at = CURRENT_TIMESTAMP', 'created_at IS NULL')
+    ops.backfill('tasks', 'updated_at = created_at', 'updated_at IS NULL')
+    ops.add_column('tasks', sa.Column('team_visible', sa.Boolean, server_default=sa.true()))
+
+@migration('0002', 'Indexes and rollup table for the board, team feed, chat and activity log queries')
+def query_indexes(ops):
+    ops.create_index('ix_tasks_user_id_status', 'tasks', ['user_id', 'status'])
+    ops.create_index('ix_tasks_team_feed', 'tasks', ['team_visible', 'updated_at DESC', 'id'])
+    ops.create_index('ix_chat_messages_conversation', 'chat_messages', ['receiver_id', 'sender_id', 'id'])
+    ops.create_index('ix_user_activities_timestamp', 'user_activities', ['timestamp', 'id'])
+    ops.create_index('ix_user_activities_user_timestamp', 'user_activities', ['user_id', 'timestamp'])
+    ops.create_index('ix_user_activities_type_timestamp', 'user_activities', ['activity_type', 'timestamp'])
+    metadata = sa.MetaData()
+    sa.Table('users', metadata, sa.Column('id', sa.Integer, primary_key=True))  # foreign key target only
+    ops.create_table(sa.Table(
+        'user_activity_rollups', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('user_id', sa.Integer, nullable=False),
+        sa.Column('day', sa.Date, nullable=False),
+        sa.Column('activity_type', sa.String(50), nullable=False),
+        sa.Column('count', sa.Integer, nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.UniqueConstraint('user_id', 'day', 'activity_type', name='uq_user_activity_rollups_key'),
+    ))
+
+@migration('0003', 'Full-text search index for tasks')
+def task_search(ops):
+    if ops.dialect == 'postgresql':
+        ops.create_index('ix_tasks_search', 'tasks', [TASK_SEARCH_VECTOR], postgresql_using='gin')
+    elif ops.dialect == 'sqlite' and not ops.has_table('tasks_fts'):
+        for statement in TASK_SEARCH_DDL['sqlite']:
+            ops.execute(statement)
+        ops.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+@migration('0004', 'Persisted task priority and the priority-ordered board index')
+def task_priority(ops):
+    # A constant default fills existing rows without rewriting the table
+    ops.add_column('tasks', sa.Column('priority_level', sa.SmallInteger, nullable=False, server_default='1'))
+    if ops.has_column('tasks', 'priority'):
+        # Carry over values saved in the varchar column the old priority scripts added
+        ops.backfill('tasks', "priority_level = CASE priority WHEN 'high' THEN 2 WHEN 'low' THEN 0 ELSE 1 END",
+                     "priority IN ('high', 'low') AND priority_level = 1")
+    ops.create_index('ix_tasks_board', 'tasks', ['user_id', 'status', 'priority_level DESC', 'updated_at DESC'])
+    # Superseded by ix_tasks_board, which starts with the same columns
+    ops.drop_index('ix_tasks_user_id_status')
+
+@migration('0005', 'task_stats counts per user and status, filled from tasks')
+def task_stats(ops):
+    if ops.has_table('task_stats'):
+        return
+    metadata = sa.MetaData()
+    sa.Table('users', metadata, sa.Column('id', sa.Integer, primary_key=True))  # foreign key target only
+    ops.create_table(sa.Table(
+        'task_stats', metadata,
+        sa.Column('user_id', sa.Integer, primary_key=True),
+        sa.Column('status', sa.String(20), primary_key=True),
+        sa.Column('task_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('visible_count', sa.Integer, nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+    ))
+    # The previous release keeps writing tasks without counting them until the deploy
+    # finishes, so run rebuild_task_stats.py once the new code is live
+    ops.execute(TASK_STATS_REBUILD_SQL)
+
+@migration('0006', 'Chat message archive (partitioned by month on Postgres)')
+def chat_archive(ops):
+    metadata = sa.MetaData()
+    sa.Table('users', metadata, sa.Column('id', sa.Integer, primary_key=True))  # foreign key target only
+    ops.create_table(sa.Table(
+        'chat_messages_archive', metadata,
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column('sender_id', sa.Integer, nullable=False),
+        sa.Column('receiver_id', sa.Integer),
+        sa.Column('message', sa.Text, nullable=False),
+        # The partition key has to be part of the primary key
+        sa.Column('timestamp', sa.DateTime, primary_key=True),
+        sa.ForeignKeyConstraint(['sender_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['receiver_id'], ['users.id']),
+        postgresql_partition_by='RANGE (timestamp)',
+    ))
+    # A plain build: the table is new and empty, and partitioned tables cannot be indexed concurrently
+    ops.execute("CREATE INDEX IF NOT EXISTS ix_chat_messages_archive_conversation "
+                "ON chat_messages_archive (receiver_id, sender_id, id)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Apply versioned schema migrations')
+    parser.add_argument('command', choices=['status', 'upgrade'])
+    parser.add_argument('--target', help='stop after this version')
+    parser.add_argument('--dry-run', action='store_true', help='print the SQL without changing anything')
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows per backfill batch')
+    parser.add_argument('--lock-timeout', default='5s', help="Postgres lock_timeout for DDL ('0' waits forever)")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.command == 'status':
+            status()
+        else:
+            applied = upgrade(args.target, args.dry_run, args.batch_size, args.lock_timeout)
+            print(f"{len(applied)} migration(s) {'pending' if args.dry_run else 'applied'}")
@@ -0,0 +1,80 @@
+"""Password hashing with a configurable algorithm and cost.
+
+The method is built from Config (PASSWORD_HASH_METHOD plus its cost
+parameters) and handed to Werkzeug, so stored hashes keep Werkzeug's
+``method$salt$hash`` format. Hashes made with any other method still verify,
+and verify() reports them as needing a rehash so login can upgrade them.
+
+Hashing can run on a bounded thread or process pool (PASSWORD_HASH_WORKERS)
+so that bursts of logins queue for a fixed number of hashing slots instead
+of all competing for CPU at once. Under gevent the thread pool uses real OS
+threads, so hashing runs beside the event loop rather than blocking it.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+def thread_pool_class():
+    """ThreadPoolExecutor, or gevent's native-thread version once threading is monkey-patched."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return ThreadPoolExecutor
+    if monkey.is_module_patched('threading'):
+        # A patched ThreadPoolExecutor would hash in greenlets on the event loop
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        return NativeThreadPoolExecutor
+    return ThreadPoolExecutor
+
+
+def build_method(config):
+    """Return the Werkzeug method string for the configured algorithm and cost."""
+    algorithm = config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    if algorithm.startswith('pbkdf2'):
+        return f"{algorithm}:{config.get('PASSWORD_HASH_ITERATIONS', 600000)}"
+    if algorithm == 'scrypt':
+        return (f"scrypt:{config.get('PASSWORD_SCRYPT_N', 32768)}:"
+                f"{config.get('PASSWORD_SCRYPT_R', 8)}:{config.get('PASSWORD_SCRYPT_P', 1)}")
+    raise ValueError(f"Unsupported PASSWORD_HASH_METHOD: {algorithm}")
+
+
+class PasswordHasher:
+
+    def __init__(self, config):
+        self._executor = None
+        self.configure(config)
+
+    def configure(self, config):
+        """(Re)read the hashing settings; used at startup and by the benchmark."""
+        if self._executor is not None:
+            self._executor.shutdown()
+        self.method = build_method(config)
+        workers = config.get('PASSWORD_HASH_WORKERS', 0)
+        self._executor = None
+        self._slots = None
+        if workers:
+            pool = ProcessPoolExecutor if config.get('PASSWORD_HASH_POOL', 'thread') == 'process' else thread_pool_class()
+            self._executor = pool(max_workers=workers)
+            # Bound the work in flight: the workers plus a short queue
+            self._slots = threading.BoundedSemaphore(workers + config.get('PASSWORD_HASH_QUEUE', workers))
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            return func(*args)
+        with self._slots:
+            return self._executor.submit(func, *args).result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """Return ``(matches, needs_rehash)``."""
+        if not stored_hash:
+            return False, False
+        matches = self._run(check_password_hash, stored_hash, password)
+        return matches, matches and self.needs_rehash(stored_hash)
+
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split('$', 1)[0] != self.method
@@ -0,0 +1,177 @@
+"""Opt-in request profiling and SQL instrumentation (PROFILING_ENABLED).
+
+For every request it records the route, wall time, number of SQL statements,
+time spent in SQL, rows reported by the driver and template render time. The
+totals per route are exported at /metrics, and each request is logged.
+
+- N+1 detection: when one request runs the same SQL statement
+  PROFILING_N_PLUS_ONE_THRESHOLD times or more, a warning names the route and
+  the statement, and the route's nexusboard_n_plus_one_total counter goes up.
+- cProfile dumps: a sampled fraction of requests (PROFILING_SAMPLE_RATE), and
+  requests sent with ``X-Profile: <PROFILING_TOKEN>``, are profiled and written
+  to PROFILING_DUMP_DIR as ``.prof`` files for snakeviz or pstats.
+
+Row counts come from the DB-API cursor's rowcount. psycopg2 reports it for
+SELECTs, but SQLite only reports it for writes.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestProfile:
+    """Counters for the request being served."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.render_time = 0.0
+        self.render_start = None
+        self.statements = Counter()
+        self.profiler = None
+
+
+class RouteStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.render_time = 0.0
+        self.n_plus_one = 0
+
+
+class RequestProfiler:
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = app.config.get('PROFILING_ENABLED', False)
+        self.threshold = app.config.get('PROFILING_N_PLUS_ONE_THRESHOLD', 10)
+        self.sample_rate = app.config.get('PROFILING_SAMPLE_RATE', 0.0)
+        self.token = app.config.get('PROFILING_TOKEN', '')
+        self.dump_dir = app.config.get('PROFILING_DUMP_DIR', 'profiles')
+        self.routes = defaultdict(RouteStats)
+        self._lock = threading.Lock()
+        if not self.enabled:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        event.listen(Engine, 'before_cursor_execute', self._before_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_execute)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+    def _start(self):
+        g.profile = RequestProfile()
+        sampled = self.sample_rate and random.random() < self.sample_rate
+        requested = self.token and request.headers.get('X-Profile') == self.token
+        if sampled or requested:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.profile.profiler = profiler
+            except ValueError:
+                # Another profiler is already running in this process
+                pass
+
+    def _current(self):
+        return g.get('profile') if has_request_context() else None
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._current() is not None:
+            conn.info.setdefault('profile_start', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = self._current()
+        if profile is None or not conn.info.get('profile_start'):
+            return
+        profile.sql_time += time.perf_counter() - conn.info['profile_start'].pop()
+        profile.sql_count += 1
+        profile.statements[statement] += 1
+        if cursor.rowcount > 0:
+            profile.rows += cursor.rowcount
+
+    def _before_render(self, sender, template, context, **extra):
+        profile = self._current()
+        if profile is not None:
+            profile.render_start = time.perf_counter()
+
+    def _after_render(self, sender, template, context, **extra):
+        profile = self._current()
+        if profile is not None and profile.render_start is not None:
+            profile.render_time += time.perf_counter() - profile.render_start
+
+    def _finish(self, response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        duration = time.perf_counter() - profile.start
+        route = request.endpoint or 'unmatched'
+
+        repeated = [(statement, count) for statement, count in profile.statements.items() if count >= self.threshold]
+        for statement, count in repeated:
+            self.app.logger.warning('Possible N+1 in %s: %d x %s', route, count, ' '.join(statement.split()))
+
+        with self._lock:
+            stats = self.routes[route]
+            stats.requests += 1
+            stats.duration += duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+            stats.sql_count += profile.sql_count
+            stats.sql_time += profile.sql_time
+            stats.rows += profile.rows
+            stats.render_time += profile.render_time
+            stats.n_plus_one += len(repeated)
+
+        self.app.logger.info(
+            '%s %s %s %.1fms sql=%d (%.1fms) rows=%d render=%.1fms', request.method, route,
+            response.status_code, duration * 1000, profile.sql_count, profile.sql_time * 1000,
+            profile.rows, profile.render_time * 1000
+        )
+        if profile.profiler is not None:
+            profile.profiler.disable()
+            self._dump(profile.profiler, route)
+        return response
+
+    def _dump(self, profiler, route):
+        os.makedirs(self.dump_dir, exist_ok=True)
+        filename = f"{route.replace('.', '_')}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{random.getrandbits(16):04x}.prof"
+        profiler.dump_stats(os.path.join(self.dump_dir, filename))
+
+    def metric_lines(self, labels=''):
+        """Per-route totals in Prometheus text format; ``labels`` are added to every sample."""
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = ['# TYPE nexusboard_request_duration_seconds histogram']
+            for route, stats in routes:
+                route_labels = f'route="{route}"{labels}'
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    lines.append(f'nexusboard_request_duration_seconds_bucket{{{route_labels},le="{bound}"}} {count}')
+                lines.append(f'nexusboard_request_duration_seconds_bucket{{{route_labels},le="+Inf"}} {stats.requests}')
+                lines.append(f'nexusboard_request_duration_seconds_sum{{{route_labels}}} {stats.duration:.6f}')
+                lines.append(f'nexusboard_request_duration_seconds_count{{{route_labels}}} {stats.requests}')
+            for metric, attribute in (('sql_queries_total', 'sql_count'), ('sql_seconds_total', 'sql_time'),
+                                      ('sql_rows_total', 'rows'), ('render_seconds_total', 'render_time'),
+                                      ('n_plus_one_total', 'n_plus_one')):
+                lines.append(f'# TYPE nexusboard_{metric} counter')
+                for route, stats in routes:
+                    value = getattr(stats, attribute)
+                    lines.append(f'nexusboard_{metric}{{route="{route}"{labels}}} {round(value, 6)}')
+        return lines
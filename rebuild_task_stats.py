@@ -0,0 +1,46 @@
+import argparse
+
+from app import app, db, invalidate_cache, TaskStat, TASK_STATS_QUERY_SQL, TASK_STATS_REBUILD_SQL
+from migrations import require_tables
+
+def compute_task_stats():
+    """Count tasks per (user, status) straight from the tasks table."""
+    return {(user_id, status): (task_count, visible_count)
+            for user_id, status, task_count, visible_count in db.session.execute(db.text(TASK_STATS_QUERY_SQL))}
+
+def stored_task_stats():
+    return {(row.user_id, row.status): (row.task_count, row.visible_count)
+            for row in db.session.query(TaskStat.user_id, TaskStat.status, TaskStat.task_count, TaskStat.visible_count)
+            if row.task_count or row.visible_count}
+
+def rebuild_task_stats():
+    """Replace task_stats with counts recomputed from tasks in one transaction.
+
+    On Postgres the table is locked first, so task writes that commit while
+    the rebuild runs wait for it and then apply their changes on top of the
+    rebuilt counts. Returns the number of rows written.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text("LOCK TABLE task_stats IN SHARE ROW EXCLUSIVE MODE"))
+    db.session.execute(db.delete(TaskStat))
+    db.session.execute(db.text(TASK_STATS_REBUILD_SQL))
+    db.session.commit()
+    invalidate_cache(['team'])
+    return db.session.query(TaskStat).count()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Recompute the task_stats table from tasks')
+    parser.add_argument('--check', action='store_true', help='only report rows that differ from tasks')
+    args = parser.parse_args()
+
+    with app.app_context():
+        require_tables(TaskStat.__tablename__)
+        if args.check:
+            expected, stored = compute_task_stats(), stored_task_stats()
+            drift = sorted(key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+            for user_id, status in drift:
+                print(f"user {user_id} {status}: stored {stored.get((user_id, status), (0, 0))}, "
+                      f"tasks {expected.get((user_id, status), (0, 0))} (all, team-visible)")
+            print(f"{len(drift)} task_stats row(s) out of date")
+            raise SystemExit(1 if drift else 0)
+        print(f"Rebuilt task_stats: {rebuild_task_stats()} rows")
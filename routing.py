@@ -0,0 +1,81 @@
+"""Read-replica routing for read-only routes.
+
+Replicas are configured as SQLALCHEMY_BINDS named ``replica0``,
+``replica1``, ... (see SQLALCHEMY_REPLICA_URIS in config.py). Views decorated
+with ``replica_reads`` run their SELECTs on one randomly chosen replica.
+Everything else uses the primary: writes, flushes, raw SQL, scripts,
+background threads, and any read made after the request has written.
+
+Read-your-writes: once a request writes, the user's session is pinned to
+the primary for REPLICA_STICKY_SECONDS, which should exceed the replicas'
+usual lag. Cached board and feed data loaded from a lagging replica can stay
+stale for at most CACHE_TTL.
+"""
+import functools
+import random
+import time
+
+import sqlalchemy as sa
+from flask import g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_PREFIX = 'replica'
+STICKY_KEY = '_primary_until'
+
+
+def replica_binds(uris, engine_options):
+    """SQLALCHEMY_BINDS entries for the replica URIs, each with its own engine options."""
+    return {f'{REPLICA_PREFIX}{i}': {'url': uri, **engine_options(uri)} for i, uri in enumerate(uris)}
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs in replica-read requests to a replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and isinstance(clause, sa.Select) and reading_from_replica():
+            replicas = [key for key in self._db.engines if key and key.startswith(REPLICA_PREFIX)]
+            if replicas:
+                # One replica per request, so a page never mixes two replicas' lag
+                return self._db.engines[g.setdefault('replica', random.choice(replicas))]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def reading_from_replica():
+    return has_request_context() and g.get('replica_reads', False) and not g.get('db_wrote', False)
+
+
+def _mark_write():
+    if has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    _mark_write()
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _after_execute(orm_execute_state):
+    if not orm_execute_state.is_select:
+        _mark_write()
+
+
+def replica_reads(view):
+    """Let a read-only view read from replicas unless its user wrote recently."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.replica_reads = session.get(STICKY_KEY, 0) < time.time()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_replica_routing(app):
+    """Pin users who just wrote to the primary; a no-op without replicas."""
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    @app.after_request
+    def stick_to_primary(response):
+        if g.get('db_wrote') and app.config.get('SQLALCHEMY_REPLICA_URIS'):
+            session[STICKY_KEY] = time.time() + sticky_seconds
+        return response
@@ -0,0 +1,34 @@
+"""Scratch database and template setup shared by the benchmark and check scripts.
+
+The app reads DATABASE_URL when it is imported, so scripts call
+use_scratch_database() before importing it:
+
+    from scratch import use_checkout_templates, use_scratch_database
+    use_scratch_database('nexusboard-check-')
+    from app import app, db
+    use_checkout_templates(app)
+"""
+import os
+import tempfile
+
+
+def use_scratch_database(prefix, url_variable=None):
+    """Point DATABASE_URL at a throwaway SQLite file and return its URL.
+
+    With ``url_variable``, a URL already set in that environment variable is
+    used instead, and a new scratch URL is stored there, so child processes
+    (such as gunicorn workers) share the same database.
+    """
+    url = os.environ.get(url_variable) if url_variable else None
+    if not url:
+        url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix=prefix), 'scratch.db')
+        if url_variable:
+            os.environ[url_variable] = url
+    os.environ['DATABASE_URL'] = url
+    return url
+
+
+def use_checkout_templates(app):
+    """Render the templates wherever they are checked out (templates/ or next to app.py)."""
+    if not os.path.isdir(os.path.join(app.root_path, app.template_folder)):
+        app.template_folder = app.root_path
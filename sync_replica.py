@@ -0,0 +1,47 @@
+"""Copy a SQLite primary into SQLite replica files for local replica testing.
+
+    DATABASE_URL=sqlite:///primary.db DATABASE_REPLICA_URLS=sqlite:///replica.db python sync_replica.py --interval 2
+
+With --interval the copy repeats, so the replica lags the primary by up to
+that many seconds. Postgres replicas are kept in sync by streaming
+replication instead.
+"""
+import argparse
+import sqlite3
+import time
+
+from sqlalchemy.engine import make_url
+
+from config import Config
+
+def sqlite_path(uri):
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or not url.database:
+        raise SystemExit(f"Not a SQLite file database: {uri}")
+    return url.database
+
+def sync_replicas(primary_uri, replica_uris):
+    source = sqlite3.connect(sqlite_path(primary_uri))
+    try:
+        for uri in replica_uris:
+            target = sqlite3.connect(sqlite_path(uri))
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Copy the SQLite primary database into the SQLite replicas')
+    parser.add_argument('--interval', type=float, default=0, help='repeat every N seconds (default: copy once)')
+    args = parser.parse_args()
+
+    if not Config.SQLALCHEMY_REPLICA_URIS:
+        raise SystemExit("Set DATABASE_REPLICA_URLS to the replica database URLs")
+    while True:
+        sync_replicas(Config.SQLALCHEMY_DATABASE_URI, Config.SQLALCHEMY_REPLICA_URIS)
+        print(f"Synced {len(Config.SQLALCHEMY_REPLICA_URIS)} replica(s)")
+        if not args.interval:
+            break
+        time.sleep(args.interval)